@@ -1,9 +1,17 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import json
+import os
 import re
+import sys
 from urllib.parse import urljoin, urlparse
 import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import dedupe, docindex, dom, encoding, fetcher, triage
+from common.concurrency import AIMDLimiter
+from common.engine import AsyncFetcher
+from common.rules import RuleSet
 
 # List of websites to scrape
 URLS = [
@@ -38,9 +46,18 @@ URLS = [
     # Add more HTML-based sites here (avoid Canva, Figma, Wix - they use heavy JS)
 ]
 
+# Name of this scraper in the shared negative cache
+SCRAPER = 'app'
+
 # Browser headers for requests
 HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
 
+# Download concurrency (ceiling for the adaptive in-flight limit, and in-flight requests per host)
+MAX_CONNECTIONS = 32
+MAX_PER_HOST = 2
+CRAWL_DELAY = 2  # seconds between requests to the same domain
+STREAM_NAV = os.environ.get('NAV_STREAM') == '1'  # opt-in: stop downloading once the header/nav region has arrived
+
 # Patterns to skip (CTA buttons, login links, etc.)
 SKIP_PATTERNS = [r'^get\s+(a\s+)?(demo|started|free)', r'^sign\s+(up|in)', r'^log\s*in', r'^try\s+', 
                  r'^contact\s+(us|sales)', r'^request\s+', r'^download\s+', r'^watch\s+', r'^view\s+all', 
@@ -60,46 +77,64 @@ USER_MENU_INDICATORS = [r'account', r'profile', r'user', r'settings', r'dashboar
 PUBLIC_NAV_KEYWORDS = ['product', 'solution', 'resource', 'feature', 'why', 'company', 'pricing', 
                        'enterprise', 'for', 'use case', 'industry', 'platform']
 
-def fetch_html(url):
-    """Fetch HTML content from URL"""
+# Which rule resolved each trigger's panel, for the end-of-run report
+PANEL_RULES = Counter()
+
+# Rule lists compiled once; each check is a single scan of the text
+SKIP_RULES, USER_MENU_RULES = RuleSet(SKIP_PATTERNS), RuleSet(USER_MENU_INDICATORS)
+PUBLIC_NAV_RULES, EXCLUDE_SET = RuleSet(PUBLIC_NAV_KEYWORDS, literal=True), frozenset(EXCLUDE_TEXT)
+
+def download(url):
+    """Blocking download of a single page (run on the engine's thread pool)"""
     try:
-        return requests.get(url, headers=HEADERS, timeout=15).text
+        return encoding.decode(fetcher.get(url, headers=HEADERS, timeout=15, stream=STREAM_NAV))
     except:
         return None
 
+LIMITER = AIMDLimiter(maximum=MAX_CONNECTIONS)
+ENGINE = AsyncFetcher(download, MAX_CONNECTIONS, MAX_PER_HOST, limiter=LIMITER, pace=fetcher.pace)
+
+async def fetch_html_async(url):
+    """Fetch HTML content from URL through the shared async engine"""
+    return await ENGINE.fetch(url)
+
+def fetch_html(url):
+    """Fetch HTML content from URL (blocking wrapper around fetch_html_async)"""
+    return asyncio.run(fetch_html_async(url))
+
 def is_site(url, domain):
     """Check if URL belongs to a specific domain"""
     return domain in urlparse(url).netloc.lower()
 
 def has_class_pattern(elem, pattern):
     """Check if element or its parent has a class matching the pattern"""
-    return elem.find(class_=re.compile(pattern, re.I)) or \
+    return docindex.find(elem, pattern) or \
            (parent := elem.find_parent(['div', 'nav', 'header'])) and \
            re.search(pattern, ' '.join(parent.get('class', [])), re.I)
 
 def is_user_menu(text, elem):
     """Determine if this is a user account menu (not public navigation)"""
-    return any(re.search(p, text.lower()) for p in USER_MENU_INDICATORS) or \
+    return USER_MENU_RULES.search(text.lower()) or \
            has_class_pattern(elem, r'user|account|profile|avatar|settings|auth|login') or \
            elem.find('img', alt=re.compile(r'user|account|profile|avatar', re.I))
 
 def is_public_nav_trigger(text, elem):
     """Check if element is likely a public navigation trigger"""
-    return any(k in text.lower() for k in PUBLIC_NAV_KEYWORDS) or len(text.lower().split()) <= 3 or \
+    return PUBLIC_NAV_RULES.search(text.lower()) or len(text.lower().split()) <= 3 or \
            has_class_pattern(elem, r'main.*nav|primary.*nav|global.*nav|top.*nav|site.*nav')
 
-def get_main_navigation_containers(soup, base_url):
-    """Find main navigation containers in the page"""
+def get_main_navigation_containers(soup, base_url, profiles=()):
+    """Find main navigation containers in the page; profiles: site configs whose markers the page carries"""
     containers = [(t, e) for t, e in [
         # Generic headers (excluding user menus)
         *[('header', h) for h in soup.find_all('header') if not re.search(r'user|account|auth|login|footer', ' '.join(h.get('class', [])), re.I)],
         # Navigation elements with specific classes
-        *[('main-nav', n) for n in soup.find_all('nav', class_=re.compile(r'main|primary|global|top|site', re.I))],
+        *[('main-nav', n) for n in docindex.find_all(soup, r'main|primary|global|top|site', 'nav')],
         # Elements with navigation role
         *[('role-nav', n) for n in soup.find_all(attrs={'role': 'navigation'}) if not re.search(r'user|account|footer|sidebar', ' '.join(n.get('class', [])), re.I)],
         # Site-specific containers
-        *([('asana', n) for n in soup.find_all('nav', class_=re.compile(r'Topbar', re.I))] if is_site(base_url, 'asana.com') else []),
-        *([('squarespace', d) for d in soup.find_all('div', class_=re.compile(r'Header-nav', re.I))] if is_site(base_url, 'squarespace.com') else [])
+        *([('asana', n) for n in docindex.find_all(soup, r'Topbar', 'nav')] if is_site(base_url, 'asana.com') or 'asana.com' in profiles else []),
+        *([('squarespace', d) for d in docindex.find_all(soup, r'Header-nav', 'div')] if is_site(base_url, 'squarespace.com') or 'squarespace.com' in profiles else [])
     ]]
     return containers if containers else [('fallback', soup)]
 
@@ -107,8 +142,8 @@ def create_trigger(elem, text, panel_id, trigger_type):
     """Create a trigger object with metadata"""
     return {'element': elem, 'menu_name': text, 'panel_id': panel_id, 'type': trigger_type, 'trigger_element': elem}
 
-def find_nav_triggers(soup, base_url):
-    """Find all navigation menu triggers (buttons/links that open dropdowns)"""
+def find_nav_triggers(soup, base_url, profiles=()):
+    """Find all navigation menu triggers (buttons/links that open dropdowns); profiles: site configs triage.markers() recognised"""
     triggers, seen = [], set()
     
     # Site-specific configurations
@@ -118,11 +153,11 @@ def find_nav_triggers(soup, base_url):
         'hubspot.com': ('button', r'global-nav-tab.*-hasSubNav', 'hubspot-button')
     }
     
-    for _, container in get_main_navigation_containers(soup, base_url):
+    for _, container in get_main_navigation_containers(soup, base_url, profiles):
         # Try site-specific patterns first
         for domain, (tag, pattern, ttype) in site_configs.items():
-            if is_site(base_url, domain):
-                for elem in container.find_all(tag, class_=re.compile(pattern, re.I)):
+            if is_site(base_url, domain) or domain in profiles:
+                for elem in docindex.find_all(container, pattern, tag):
                     text = elem.get_text(strip=True)
                     if text and 2 <= len(text) <= 50 and text.lower() not in seen and not is_user_menu(text, elem):
                         triggers.append(create_trigger(elem, text, elem.get('aria-controls'), ttype))
@@ -139,7 +174,7 @@ def find_nav_triggers(soup, base_url):
         # Fallback to class-based patterns
         if len(triggers) < 3:
             for pattern in [r'dropdown.*toggle', r'menu.*trigger', r'nav.*trigger', r'has.*dropdown', r'has.*submenu', r'NavigationMenu.*trigger']:
-                for elem in container.find_all(['button', 'a'], class_=re.compile(pattern, re.I)):
+                for elem in docindex.find_all(container, pattern, ['button', 'a']):
                     text = elem.get_text(strip=True)
                     if text and 2 <= len(text) <= 50 and text.lower() not in seen and not is_user_menu(text, elem) and is_public_nav_trigger(text, elem):
                         triggers.append(create_trigger(elem, text, elem.get('aria-controls'), 'class-pattern'))
@@ -152,26 +187,25 @@ def find_nav_triggers(soup, base_url):
 
 def is_valid_panel(panel):
     """Check if panel has a reasonable number of links"""
-    return panel and 2 <= len(panel.find_all('a', href=True)) <= 50
+    return panel and 2 <= docindex.count(panel, 'a[href]') <= 50
 
 def is_user_panel(panel):
     """Determine if panel is a user menu (not public navigation)"""
     if not panel:
         return False
-    text = panel.get_text(strip=True).lower()
+    text = docindex.text(panel).lower()
     # Check if multiple user indicators are present
-    if sum(1 for p in USER_MENU_INDICATORS if re.search(p, text)) >= 3:
+    if USER_MENU_RULES.count(text) >= 3:
         return True
     # Check if majority of links are user-related
     links = panel.find_all('a', href=True)
-    return len(links) > 0 and sum(1 for l in links if any(re.search(p, l.get_text(strip=True).lower()) for p in USER_MENU_INDICATORS)) / len(links) > 0.5
+    return len(links) > 0 and sum(1 for l in links if USER_MENU_RULES.search(docindex.text(l).lower())) / len(links) > 0.5
 
 def score_panel(panel):
     """Score panel based on characteristics to find the best match"""
     if not panel:
         return 0
-    classes, links = ' '.join(panel.get('class', [])), panel.find_all('a', href=True)
-    link_count = len(links)
+    classes, link_count = ' '.join(panel.get('class', [])), docindex.count(panel, 'a[href]')
     if not (2 <= link_count <= 50):
         return 0
     
@@ -180,53 +214,65 @@ def score_panel(panel):
              3 if re.search(r'menu|dropdown|nav|content|panel|flyout', classes, re.I) else 0) + \
             (3 if any(x in panel.get('style', '').replace(' ', '') for x in ['display:none', 'visibility:hidden']) or panel.get('aria-hidden') == 'true' else 0) + \
             (3 if panel.get('role') in ['menu', 'navigation', 'menubar'] else 0) + \
-            (2 if panel.find_all(['h2', 'h3', 'h4', 'h5', 'h6'], limit=1) else 0) + \
-            (3 if sum(1 for k in PUBLIC_NAV_KEYWORDS if k in panel.get_text(strip=True).lower()) >= 2 else 0)
+            (2 if docindex.count(panel, 'h2', 'h3', 'h4', 'h5', 'h6') else 0) + \
+            (3 if PUBLIC_NAV_RULES.count(docindex.text(panel).lower()) >= 2 else 0)
     return score
 
-def find_panel_for_trigger(soup, trigger_info):
-    """Find the dropdown panel associated with a trigger"""
+def find_panel_for_trigger(soup, trigger_info, ranked=None):
+    """Find the dropdown panel associated with a trigger: (panel, rule that found it), or (None, None).
+    ranked caches the scored fallback candidates per container across triggers."""
     elem, panel_id, ttype = trigger_info['trigger_element'], trigger_info.get('panel_id'), trigger_info['type']
     
     # Site-specific panel finding
-    if ttype == 'asana-nav' and panel_id and (panel := soup.find(id=panel_id)):
-        return panel
+    if ttype == 'asana-nav' and panel_id and (panel := dom.by_id(soup, panel_id)):
+        return panel, 'asana-id'
     if ttype == 'squarespace-folder' and (parent := elem.find_parent('div', class_=re.compile(r'Header-nav-folder', re.I))) and \
-       (panel := parent.find('div', class_=re.compile(r'Header-nav-folder-content', re.I))):
-        return panel
+       (panel := docindex.find(parent, r'Header-nav-folder-content', 'div')):
+        return panel, 'squarespace-folder'
     if ttype == 'hubspot-button':
         if panel := elem.find_next_sibling('section', class_=re.compile(r'global-nav-tab-dropdown', re.I)):
-            return panel
+            return panel, 'hubspot-sibling'
         if (parent := elem.find_parent(['div', 'nav'])) and (panel := parent.find_next_sibling('section', class_=re.compile(r'dropdown', re.I))):
-            return panel
+            return panel, 'hubspot-parent-sibling'
     
     # Try finding panel by ID
     if panel_id:
-        for finder in [lambda: soup.find(id=panel_id), lambda: soup.find(attrs={'aria-labelledby': panel_id})]:
+        for rule, finder in [('aria-controls', lambda: dom.by_id(soup, panel_id)), ('aria-labelledby', lambda: docindex.by_labelledby(soup, panel_id))]:
             if (panel := finder()) and is_valid_panel(panel):
-                return panel
+                return panel, rule
     
     # Check siblings for dropdown panels
     for sibling in [elem.find_next_sibling(), elem.find_previous_sibling()]:
         if sibling and sibling.name in ['div', 'ul', 'nav', 'section'] and \
            re.search(r'dropdown|mega|menu|submenu|panel|content|flyout', ' '.join(sibling.get('class', [])), re.I) and \
            is_valid_panel(sibling) and not is_user_panel(sibling):
-            return sibling
+            return sibling, 'sibling'
     
     # Check parent's children
     if (parent := elem.find_parent(['li', 'div', 'nav'])):
         for child in parent.find_all(['div', 'ul', 'nav', 'section'], recursive=False):
             if child != elem and is_valid_panel(child) and not is_user_panel(child):
-                return child
+                return child, 'parent-child'
     
-    # Score and rank potential panels
-    candidates = [(score_panel(c), c) for c in (elem.find_parent(['header', 'nav']) or soup).find_all(['div', 'ul', 'nav', 'section'], limit=30)
-                  if c != elem and elem not in c.parents and not is_user_panel(c) and score_panel(c) > 3]
-    return max(candidates, key=lambda x: x[0])[1] if candidates else None
+    # Score and rank potential panels; scores don't depend on the trigger, so each container is ranked once
+    scope = elem.find_parent(['header', 'nav']) or soup
+    if (candidates := (ranked := {} if ranked is None else ranked).get(id(scope))) is None:
+        candidates = ranked[id(scope)] = [(score, c) for c in scope.find_all(['div', 'ul', 'nav', 'section'], limit=30)
+                                          if not is_user_panel(c) and (score := score_panel(c)) > 3]
+    if candidates := [(score, c) for score, c in candidates if c != elem and elem not in c.parents]:
+        return max(candidates, key=lambda x: x[0])[1], 'scored'
+    return None, None
+
+def resolve_panels(soup, triggers):
+    """Panels for all triggers in one batch: {id(trigger element): (panel, rule)}"""
+    ranked = {}
+    panels = {id(t['trigger_element']): find_panel_for_trigger(soup, t, ranked) for t in triggers}
+    PANEL_RULES.update(rule or 'unresolved' for _, rule in panels.values())
+    return panels
 
 def should_skip_link(title):
     """Check if link should be skipped based on patterns"""
-    return any(re.search(p, title.lower().strip(), re.I) for p in SKIP_PATTERNS) or title.lower().strip() in EXCLUDE_TEXT
+    return SKIP_RULES.search(title := title.lower().strip()) or title in EXCLUDE_SET
 
 def extract_item_data(link, base_url):
     """Extract title, description, and URL from a link"""
@@ -237,9 +283,9 @@ def extract_item_data(link, base_url):
     # Find title using various strategies
     title, title_elem = "", None
     for finder in [
-        lambda: link.find(class_=re.compile(r'title|heading|name|label|menuItem.*Title|item.*title|link.*title', re.I)),
+        lambda: docindex.find(link, r'title|heading|name|label|menuItem.*Title|item.*title|link.*title'),
         lambda: link.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'b']),
-        lambda: link.find('span', class_=re.compile(r'text|label|title|name', re.I)),
+        lambda: docindex.find(link, r'text|label|title|name', 'span'),
         lambda: next((t.strip() for t in link.stripped_strings if 2 <= len(t) < 150), None),
         lambda: link.get('aria-label', '').strip()
     ]:
@@ -251,7 +297,7 @@ def extract_item_data(link, base_url):
     # Find description
     desc = ""
     for finder in [
-        lambda: link.find(class_=re.compile(r'desc|description|subtitle|summary|excerpt|menuItem.*Desc|item.*desc', re.I)),
+        lambda: docindex.find(link, r'desc|description|subtitle|summary|excerpt|menuItem.*Desc|item.*desc'),
         lambda: link.find('p')
     ]:
         if (elem := finder()) and elem != title_elem and (text := elem.get_text(strip=True)) != title:
@@ -266,17 +312,17 @@ def extract_item_data(link, base_url):
     url = urljoin(base_url, href)
     return None if url in [base_url, base_url + '/'] else {'title': title, 'description': desc, 'url': url}
 
-def extract_hierarchical_menu(panel, base_url):
+def extract_hierarchical_menu(panel, base_url, profiles=()):
     """Extract menu items organized by sections"""
     # Special handling 
-    if is_site(base_url, 'hubspot.com'):
+    if is_site(base_url, 'hubspot.com') or 'hubspot.com' in profiles:
         sections, seen = [], set()
-        for group in panel.find_all(['div', 'ul'], class_=re.compile(r'global-nav-card-group', re.I)):
+        for group in docindex.find_all(panel, r'global-nav-card-group', ['div', 'ul']):
             group_title = (t.get_text(strip=True) if (t := group.find_previous(['h2', 'h3'], class_=re.compile(r'title', re.I))) else None)
             items = []
-            for card in group.find_all(['li', 'div'], class_=re.compile(r'global-nav-card', re.I)):
-                if (te := card.find(['h3', 'h4'], class_=re.compile(r'title', re.I))) and (le := card.find('a', href=True)):
-                    title, desc, href = te.get_text(strip=True), ((de.get_text(strip=True) if (de := card.find('p', class_=re.compile(r'description', re.I))) else "")), le.get('href', '')
+            for card in docindex.find_all(group, r'global-nav-card', ['li', 'div']):
+                if (te := docindex.find(card, r'title', ['h3', 'h4'])) and (le := card.find('a', href=True)):
+                    title, desc, href = te.get_text(strip=True), ((de.get_text(strip=True) if (de := docindex.find(card, r'description', 'p')) else "")), le.get('href', '')
                     if href not in ['#', 'javascript:void(0)'] and title.lower() not in seen and not should_skip_link(title):
                         seen.add(title.lower())
                         items.append({'title': title, 'description': desc, 'url': urljoin(base_url, href)})
@@ -293,15 +339,15 @@ def extract_hierarchical_menu(panel, base_url):
     sections, processed = [], set()
     
     # Strategy 1: Find containers with column/section classes
-    containers = [c for c in panel.find_all(['div', 'ul', 'nav', 'section', 'li'], 
-                  class_=re.compile(r'column|col-|grid-|section|group|category|channel|menu-group|nav-group|menu-column', re.I))
-                  if len(c.find_all('a', href=True)) >= 2]
+    containers = [c for c in docindex.find_all(panel, r'column|col-|grid-|section|group|category|channel|menu-group|nav-group|menu-column',
+                                    ['div', 'ul', 'nav', 'section', 'li'])
+                  if docindex.count(c, 'a[href]') >= 2]
     
     if containers:
         for container in containers:
             # Find section title
             title = (h.get_text(strip=True) if (h := container.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])) else
-                    (t.get_text(strip=True) if (t := container.find(class_=re.compile(r'title|heading|category|section.*title', re.I))) else None))
+                    (t.get_text(strip=True) if (t := docindex.find(container, r'title|heading|category|section.*title')) else None))
             # Extract links
             items = [d for l in container.find_all('a', href=True) if id(l) not in processed and (d := extract_item_data(l, base_url)) and not processed.add(id(l))]
             if items:
@@ -338,25 +384,40 @@ def extract_hierarchical_menu(panel, base_url):
     
     return [s for s in sections if s['items']]
 
-def scrape_website(url):
-    """Main function to scrape a website's navigation menu"""
-    # Fetch HTML and find triggers
-    if not (html := fetch_html(url)) or not (triggers := find_nav_triggers(BeautifulSoup(html, 'html.parser'), url)):
+def extract_menus(html, url, soup=None, profiles=()):
+    """Extract the navigation menus from a downloaded page (or its already parsed tree)"""
+    if soup is None:
+        # Triage the raw page: JS-only shells are rejected unparsed
+        if not html or (verdict := triage.triage(html))['strategy'] == 'shell':
+            return None
+        # Trigger and panel selection look across the whole document, so the full page is parsed (once, shared by every phase)
+        return extract_menus(html, url, soup := dom.parse(html, regions=False), triage.markers(soup))
+    # Find triggers; panels are looked up in the same tree the triggers came from
+    if not (triggers := find_nav_triggers(soup, url, profiles)):
         return None
     
-    soup = BeautifulSoup(html, 'html.parser')
     menu_data = {'website': url, 'domain': urlparse(url).netloc, 'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'), 'menus': []}
-    global_seen, seen_names = set(), set()
+    global_seen, seen_names, copies = set(), set(), set()
+    emitted = {}  # panel fingerprint -> URLs its first copy yielded
+    panels = resolve_panels(soup, triggers)
     
     # Process each trigger
     for trigger in triggers:
         if (name := trigger['menu_name']).lower() in seen_names:
             continue
         # Find and validate panel
-        if not (panel := find_panel_for_trigger(soup, trigger)) or not is_valid_panel(panel):
+        if not (panel := panels[id(trigger['trigger_element'])][0]) or not is_valid_panel(panel):
+            continue
+        # A copy of a panel already extracted (same panel, or a desktop/mobile duplicate) is skipped once
+        # every URL the first copy yielded is seen; links that extraction drops never count against it
+        key = dedupe.fingerprint(panel)
+        if dedupe.is_copy(panel, copies) and key in emitted and emitted[key] <= global_seen:
+            dedupe.skipped(docindex.count(panel, 'a[href]'))
             continue
         # Extract menu structure
-        if sections := extract_hierarchical_menu(panel, url):
+        sections = extract_hierarchical_menu(panel, url, profiles)
+        emitted.setdefault(key, {i['url'] for s in sections or () for i in s['items']})
+        if sections:
             # Remove globally seen URLs
             for s in sections:
                 s['items'] = [i for i in s['items'] if i['url'] not in global_seen and not global_seen.add(i['url'])]
@@ -366,13 +427,42 @@ def scrape_website(url):
     
     return menu_data if menu_data['menus'] else None
 
+def scrape_website(url):
+    """Main function to scrape a website's navigation menu"""
+    return extract_menus(fetch_html(url), url)
+
+async def scrape_website_async(url):
+    """Scrape a website's navigation menu, letting the download overlap with other sites"""
+    return extract_menus(await fetch_html_async(url), url)
+
+def save_menu(url, data):
+    """Write scraped menu data to <domain>.json"""
+    with open(f"{urlparse(url).netloc.replace('www.', '')}.json", 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+async def crawl(urls):
+    """Scrape all URLs concurrently (limits are enforced by ENGINE), skipping sites known to be dead or unparseable"""
+    async def run(url):
+        if not (html := await fetch_html_async(url)):
+            return
+        if data := extract_menus(html, url):
+            save_menu(url, data)
+        else:
+            fetcher.mark_unparseable(url, SCRAPER)
+    # Inputs that are the same site (www./non-www., known redirects) are scraped once
+    await asyncio.gather(*(run(url) for url in fetcher.jobs(urls) if not fetcher.is_known_bad(url, SCRAPER)))
+
 def main():
     """Run scraper for all URLs"""
-    for url in URLS:
-        if data := scrape_website(url):
-            with open(f"{urlparse(url).netloc.replace('www.', '')}.json", 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        time.sleep(2)
+    fetcher.shared_fetcher().scheduler.delay = CRAWL_DELAY
+    fetcher.observe(LIMITER.record)
+    asyncio.run(crawl(URLS))
+    print(fetcher.report())
+    print(f"Triage: {triage.report()}")
+    print(f"Parsing: {dom.report()}")
+    print(f"Duplicates: {dedupe.report()}")
+    print(f"Panels: {', '.join(f'{n} {rule}' for rule, n in PANEL_RULES.most_common()) or 'none'}")
+    print(f"Concurrency: {LIMITER.report()}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
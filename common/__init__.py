@@ -0,0 +1 @@
+"""Shared fetch and parsing helpers used by the app/, deep/ and try/ scrapers."""
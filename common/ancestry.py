@@ -0,0 +1,48 @@
+"""Inherited ancestor flags ("inside a footer", "inside main content", ...) computed top-down.
+
+An Ancestry is a named set of element predicates. For every element it
+records how many levels up the nearest ancestor matching each predicate is,
+derived from the parent's record, so "is this link within 12 levels of a
+footer" is a lookup instead of a walk over elem.parents. Records are filled
+in from the top of the document down to the queried element the first time a
+query reaches that part of the tree and memoised on the elements, so each
+element's predicates run at most once per document and only the ancestor
+chains of queried elements are ever visited.
+"""
+from math import inf
+
+
+def cls_id(elem):
+    """Lowercased class tokens and id, the string the ancestor predicates match against"""
+    return ' '.join(elem.get('class', [])).lower() + ' ' + elem.get('id', '').lower()
+
+
+class Ancestry:
+    """predicates: flag name -> fn(elem, cls_id) -> bool"""
+
+    def __init__(self, **predicates):
+        self.flags, self.predicates = {name: i for i, name in enumerate(predicates)}, list(predicates.values())
+        self.key = f"_ancestry_{id(self)}"  # per-element memo attribute
+        self.top = ((inf,) * len(self.predicates), (False,) * len(self.predicates))  # above the document root
+
+    def _record(self, elem):
+        """(distance to nearest matching strict ancestor per flag, whether elem itself matches per flag)"""
+        chain, node, record = [], elem, None
+        while node is not None and (record := node.__dict__.get(self.key)) is None:
+            chain.append(node)
+            node = node.parent
+        record = record or self.top
+        for node in reversed(chain):
+            distances, matches = record
+            key = cls_id(node)
+            record = node.__dict__[self.key] = (tuple(1 if m else d + 1 for d, m in zip(distances, matches)),
+                                                tuple(bool(p(node, key)) for p in self.predicates))
+        return record
+
+    def distance(self, elem, flag):
+        """Levels up to the nearest strict ancestor matching flag (inf if none)"""
+        return self._record(elem)[0][self.flags[flag]]
+
+    def within(self, elem, flag, levels=None):
+        """True if one of elem's nearest `levels` ancestors (any ancestor if None) matches flag"""
+        return (distance := self.distance(elem, flag)) < inf and (levels is None or distance <= levels)
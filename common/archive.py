@@ -0,0 +1,91 @@
+"""Snapshot archive for record/replay fetching.
+
+In record mode every response the fetcher returns is saved (headers plus
+body, keyed by URL and fetch time); in replay mode the fetcher answers from
+the newest snapshot of a URL with no network at all, so extraction can be
+re-run over thousands of pages at CPU speed.
+
+    python -m common.archive import https://stripe.com app/stripe_sample.html
+    python -m common.archive list
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+
+from .transport import Response
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'snapshots.sqlite')
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS snapshots (
+    url TEXT, fetched_at REAL, final_url TEXT, status INTEGER, headers TEXT, content BLOB, encoding TEXT,
+    elapsed REAL, truncated INTEGER, PRIMARY KEY (url, fetched_at))"""
+
+
+class ReplayMiss(LookupError):
+    """Raised in replay mode when the archive has no snapshot for a URL"""
+
+
+class SnapshotArchive:
+    """Append-only store of raw responses; bodies are zlib-compressed"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path, self.stats, self._local = path, Counter(), threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._db() as db:
+            db.execute(SCHEMA)
+
+    def _db(self):
+        if (db := getattr(self._local, 'db', None)) is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+        return db
+
+    def record(self, url, resp, fetched_at=None):
+        with self._db() as db:
+            db.execute('INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                       (url, fetched_at or time.time(), resp.url, resp.status, json.dumps(resp.headers),
+                        zlib.compress(resp.content, 6), resp.encoding, resp.elapsed, resp.truncated))
+        self.stats['recorded'] += 1
+
+    def latest(self, url, before=None):
+        """Newest snapshot of url (optionally taken before a timestamp), trying the url with and without a trailing slash"""
+        for candidate in dict.fromkeys([url, url.rstrip('/'), url.rstrip('/') + '/']):
+            row = self._db().execute('SELECT final_url, status, headers, content, encoding, elapsed, truncated FROM snapshots '
+                                     'WHERE url = ? AND fetched_at <= ? ORDER BY fetched_at DESC LIMIT 1',
+                                     (candidate, before or float('inf'))).fetchone()
+            if row:
+                self.stats['replayed'] += 1
+                final_url, status, headers, content, encoding, elapsed, truncated = row
+                return Response(final_url, status, json.loads(headers), zlib.decompress(content), encoding, elapsed,
+                                truncated=bool(truncated))
+        self.stats['missing'] += 1
+        raise ReplayMiss(f"no snapshot for {url}")
+
+    def urls(self):
+        return self._db().execute('SELECT url, COUNT(*), MAX(fetched_at) FROM snapshots GROUP BY url ORDER BY url').fetchall()
+
+    def report(self):
+        s = self.stats
+        return f"{s['recorded']} recorded, {s['replayed']} replayed, {s['missing']} missing"
+
+
+def main(argv):
+    archive = SnapshotArchive(os.environ.get('NAV_ARCHIVE', DEFAULT_PATH))
+    if argv[:1] == ['import'] and len(argv) == 3:
+        with open(argv[2], 'rb') as f:
+            archive.record(argv[1], Response(argv[1], 200, {'content-type': 'text/html; charset=utf-8'}, f.read(), 'utf-8'))
+        print(f"Imported {argv[2]} as {argv[1]}")
+    elif argv[:1] == ['list']:
+        for url, count, last in archive.urls():
+            print(f"{url:60s} {count:3d} snapshot(s), latest {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last))}")
+    else:
+        print(__doc__)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
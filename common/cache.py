@@ -0,0 +1,90 @@
+"""Persistent HTTP cache with ETag/Last-Modified revalidation.
+
+Entries live in one SQLite file in WAL mode, so several worker processes can
+read and write the same cache concurrently. Stale entries are revalidated
+with a conditional GET and a 304 is served from disk.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from .transport import Response
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'http.sqlite')
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY, final_url TEXT, status INTEGER, headers TEXT, content BLOB, encoding TEXT,
+    etag TEXT, last_modified TEXT, elapsed REAL, stored_at REAL, truncated INTEGER DEFAULT 0)"""
+
+
+class HTTPCache:
+    """URL -> last good response, with the validators needed for conditional GETs"""
+
+    def __init__(self, path=DEFAULT_PATH, max_age=0):
+        self.path, self.max_age = path, max_age  # max_age: seconds an entry is served without revalidating
+        self.stats, self._lock, self._local = Counter(), threading.Lock(), threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._db() as db:
+            db.execute(SCHEMA)
+            if 'truncated' not in {row[1] for row in db.execute('PRAGMA table_info(responses)')}:
+                db.execute('ALTER TABLE responses ADD COLUMN truncated INTEGER DEFAULT 0')
+
+    def _db(self):
+        """One connection per thread; WAL lets other processes read while one writes"""
+        if (db := getattr(self._local, 'db', None)) is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+        return db
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def lookup(self, url, allow_truncated=False, max_age=None):
+        """Return (entry, is_fresh) for url, or (None, False) when nothing usable is stored.
+
+        Bodies cut short by a streamed download only satisfy streaming callers; max_age overrides the cache's own.
+        """
+        row = self._db().execute('SELECT url, final_url, status, headers, content, encoding, etag, last_modified, elapsed, stored_at, truncated '
+                                 'FROM responses WHERE url = ?', (url,)).fetchone()
+        if not row or (row[-1] and not allow_truncated):
+            return None, False
+        entry = dict(zip(['url', 'final_url', 'status', 'headers', 'content', 'encoding', 'etag', 'last_modified', 'elapsed', 'stored_at', 'truncated'], row))
+        return entry, time.time() - entry['stored_at'] < (self.max_age if max_age is None else max_age)
+
+    def conditional_headers(self, entry):
+        """If-None-Match / If-Modified-Since for a stored entry"""
+        return {k: v for k, v in [('If-None-Match', entry['etag']), ('If-Modified-Since', entry['last_modified'])] if v}
+
+    def to_response(self, entry):
+        return Response(entry['final_url'], entry['status'], json.loads(entry['headers']), entry['content'],
+                        entry['encoding'], 0.0, from_cache=True, truncated=bool(entry['truncated']))
+
+    def hit(self, entry, revalidated=False, elapsed=0.0):
+        """Account for a response served from disk; a 304 also restarts the entry's freshness clock"""
+        self.count('revalidated' if revalidated else 'hits')
+        self.count('bytes_saved', len(entry['content']))
+        self.count('seconds_saved', max(entry['elapsed'] - elapsed, 0))
+        if revalidated:
+            with self._db() as db:
+                db.execute('UPDATE responses SET stored_at = ? WHERE url = ?', (time.time(), entry['url']))
+        return self.to_response(entry)
+
+    def store(self, url, resp):
+        """Save a 200 response with its validators"""
+        self.count('misses')
+        if resp.status != 200:
+            return
+        with self._db() as db:
+            db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                       (url, resp.url, resp.status, json.dumps(resp.headers), resp.content, resp.encoding,
+                        resp.headers.get('etag'), resp.headers.get('last-modified'), resp.elapsed, time.time(), resp.truncated))
+
+    def report(self):
+        s = self.stats
+        return (f"{s['hits']} hits, {s['revalidated']} revalidated (304), {s['misses']} misses, "
+                f"{s['bytes_saved'] / 1e6:.2f} MB and {s['seconds_saved']:.1f}s saved")
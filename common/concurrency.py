@@ -0,0 +1,58 @@
+"""AIMD controller for the crawl's global in-flight limit.
+
+The limit grows by about one slot per round of healthy completions and is cut
+multiplicatively when targets time out or throttle (429/503), so throughput
+follows what the network and the sites can actually take.
+"""
+import asyncio
+import threading
+import time
+from collections import Counter
+
+
+class AIMDLimiter:
+    """Async context manager gating in-flight requests; record() feeds it request outcomes from any thread"""
+
+    def __init__(self, initial=4, minimum=1, maximum=64, decrease=0.5, error_budget=0.05):
+        self.limit, self.minimum, self.maximum = float(initial), minimum, maximum
+        self.decrease, self.error_budget = decrease, error_budget
+        self.inflight, self.latency, self.error_rate = 0, None, 0.0  # EWMAs of latency and error share
+        self.stats, self._lock, self._loop, self._last_cut = Counter(), threading.Lock(), None, 0.0
+        self.peak = self.limit
+
+    def _condition(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop, self._cond = loop, asyncio.Condition()
+        return self._cond
+
+    async def __aenter__(self):
+        async with self._condition():
+            await self._cond.wait_for(lambda: self.inflight < int(self.limit))
+            self.inflight += 1
+
+    async def __aexit__(self, *exc):
+        async with self._condition():
+            self.inflight -= 1
+            self._cond.notify_all()
+
+    def record(self, signal, elapsed):
+        """signal: None (success), 'throttle', 'timeout' or 'error'; elapsed: seconds the attempt took"""
+        with self._lock:
+            self.error_rate = 0.9 * self.error_rate + 0.1 * (signal is not None)
+            if signal in ('throttle', 'timeout'):
+                # One cut per latency period, however many in-flight requests report the same congestion
+                if time.monotonic() - self._last_cut > (self.latency or 1.0):
+                    self.limit, self._last_cut = max(self.minimum, self.limit * self.decrease), time.monotonic()
+                    self.stats['cuts'] += 1
+                return
+            if signal is None:
+                slow = self.latency is not None and elapsed > 2 * self.latency
+                self.latency = elapsed if self.latency is None else 0.9 * self.latency + 0.1 * elapsed
+                if not slow and self.error_rate < self.error_budget:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                    self.peak = max(self.peak, self.limit)
+
+    def report(self):
+        return (f"in-flight limit {int(self.limit)} (peak {int(self.peak)}, max {self.maximum}), "
+                f"{self.stats['cuts']} multiplicative cuts, error rate {self.error_rate * 100:.0f}%")
@@ -0,0 +1,51 @@
+"""Structural fingerprints of subtrees, for spotting menus a page ships twice.
+
+Sites often render the same mega menu once for desktop and once for mobile.
+fingerprint() hashes a subtree's shape and wording (tag names, classes, link
+hrefs, aria-labels and text) bottom-up, memoised per element, so a panel can be
+recognised as a copy of one already extracted before any extraction work is
+spent on it.
+"""
+from collections import Counter
+
+from bs4 import NavigableString, Tag
+
+from . import docindex
+
+STATS = Counter()
+
+
+def fingerprint(elem):
+    """Hash of elem's subtree: tag name, classes, href, aria-label and own text of every element, in tree order"""
+    if (value := elem.__dict__.get('_fingerprint')) is None:
+        elements, (start, end) = docindex.index(elem).elements, docindex.span(elem)
+        # Reverse document order visits every child before its parent
+        for node in [*reversed(elements[start + 1:end + 1]), elem]:
+            if '_fingerprint' not in node.__dict__:
+                children = node.contents
+                node.__dict__['_fingerprint'] = hash((node.name, tuple(node.get('class', [])), node.get('href'), node.get('aria-label'),
+                                                      ' '.join(t for c in children if isinstance(c, NavigableString) and (t := c.strip())),
+                                                      tuple(c.__dict__['_fingerprint'] for c in children if isinstance(c, Tag))))
+        value = elem.__dict__['_fingerprint']
+    return value
+
+
+def is_copy(elem, seen):
+    """True if a subtree with elem's fingerprint is already in seen; records elem's fingerprint"""
+    STATS['panels'] += 1
+    if (value := fingerprint(elem)) in seen:
+        STATS['copies'] += 1
+        return True
+    seen.add(value)
+    return False
+
+
+def skipped(links):
+    """Count a copy whose extraction was skipped and the number of links it held"""
+    STATS['skipped'] += 1
+    STATS['links'] += links
+
+
+def report():
+    return (f"{STATS['copies']} of {STATS['panels']} panels were copies of an earlier one, "
+            f"{STATS['skipped']} skipped ({STATS['links']} links not re-extracted)")
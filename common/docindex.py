@@ -0,0 +1,123 @@
+"""Per-document lookup index: id, aria-labelledby and class tokens to elements, plus subtree stats.
+
+Built in one pass over a parsed tree the first time a lookup needs it and
+cached on the tree. Each element also gets its document-order span, so a
+class query scoped to any container is a bisect into the (cached) list of
+elements whose classes match, not a rescan of the container's subtree.
+Class matching follows bs4's class_=re.compile(...) rules: a match on any
+single class token or on the space-joined class string.
+
+The same pass records each tag name's positions (and those of <a href>) and
+every element's depth below <body>, so "how many links/headings/lists are
+under this element" is two bisects rather than a find_all over its subtree.
+get_text(strip=True) results are memoised per element by text().
+"""
+import re
+from bisect import bisect_right
+from collections import defaultdict
+
+
+class DocIndex:
+    def __init__(self, root):
+        self.root, self.ids, self.labelledby = root, {}, {}
+        self.elements = root.find_all(True)  # document order, as find_next() visits them
+        self.classes = defaultdict(list)  # class token or joined class string -> elements
+        self.order, self.end, self._patterns = {}, {}, {}  # id(elem) -> ordinal / last ordinal in its subtree
+        self.tags = defaultdict(list)  # tag name (or 'a[href]') -> ordinals
+        self.depth = {}  # id(elem) -> index of the nearest <body> in elem.parents, 0 if none
+        stack = []  # (ordinal, elem, level of the nearest <body> at or above elem)
+        for i, elem in enumerate(self.elements):
+            while stack and stack[-1][1] is not elem.parent:
+                self.end[id(stack.pop()[1])] = i - 1
+            level, body = len(stack), stack[-1][2] if stack else None
+            self.depth[id(elem)] = 0 if body is None else level - body - 1
+            stack.append((i, elem, level if elem.name == 'body' else body))
+            self.order[id(elem)] = i
+            self.tags[elem.name].append(i)
+            attrs = elem.attrs
+            if elem.name == 'a' and 'href' in attrs:
+                self.tags['a[href]'].append(i)
+            if (value := attrs.get('id')) is not None:
+                self.ids.setdefault(value, elem)
+            if (value := attrs.get('aria-labelledby')) is not None:
+                self.labelledby.setdefault(value, elem)
+            if classes := attrs.get('class'):
+                for token in dict.fromkeys([*classes, ' '.join(classes)]):
+                    self.classes[token].append(elem)
+        for _, elem, _ in stack:
+            self.end[id(elem)] = len(self.order) - 1
+
+    def _matching(self, pattern):
+        """(ordinals, elements) in document order whose class matches pattern; computed once per pattern"""
+        if (hit := self._patterns.get(pattern)) is None:
+            rx = re.compile(pattern, re.I)
+            found = {id(e): e for token, elems in self.classes.items() if rx.search(token) for e in elems}
+            elems = sorted(found.values(), key=lambda e: self.order[id(e)])
+            hit = self._patterns[pattern] = ([self.order[id(e)] for e in elems], elems)
+        return hit
+
+    def find_all(self, scope, pattern, names=None, limit=None):
+        """Descendants of scope whose class matches pattern (case-insensitive), optionally restricted to tag names"""
+        ordinals, elems = self._matching(pattern)
+        start, end = self.span(scope)
+        lo, hi = bisect_right(ordinals, start), bisect_right(ordinals, end)
+        names = {names} if isinstance(names, str) else names
+        found = [e for e in elems[lo:hi] if not names or e.name in names]
+        return found[:limit] if limit else found
+
+    def span(self, elem):
+        """(ordinal of elem, ordinal of the last element in its subtree); the root spans the whole document"""
+        return (-1, len(self.elements) - 1) if elem is self.root else (self.order[id(elem)], self.end[id(elem)])
+
+    def count(self, scope, *names):
+        """Number of descendants of scope with one of the tag names ('a[href]': links with an href)"""
+        start, end = self.span(scope)
+        return sum(bisect_right(ordinals, end) - bisect_right(ordinals, start) for n in names if (ordinals := self.tags.get(n)))
+
+
+def index(node):
+    """DocIndex of the document node belongs to, built on first use"""
+    root = node
+    while root.parent is not None:
+        root = root.parent
+    if (idx := root.__dict__.get('_docindex')) is None:  # getattr on a tree would search it for a <_docindex> tag
+        idx = root._docindex = DocIndex(root)
+    return idx
+
+
+def find_all(scope, pattern, names=None, limit=None):
+    """scope.find_all(names, class_=re.compile(pattern, re.I), limit=limit), answered from the index"""
+    return index(scope).find_all(scope, pattern, names, limit)
+
+
+def find(scope, pattern, names=None):
+    return next(iter(find_all(scope, pattern, names, 1)), None)
+
+
+def count(scope, *names):
+    """len(scope.find_all(names)), with 'a[href]' for find_all('a', href=True), answered from the index"""
+    return index(scope).count(scope, *names)
+
+
+def span(elem):
+    return index(elem).span(elem)
+
+
+def depth(elem):
+    """Index of the nearest <body> among elem's parents (0 if none)"""
+    return index(elem).depth[id(elem)]
+
+
+def text(elem):
+    """elem.get_text(strip=True), computed once per element"""
+    if (value := elem.__dict__.get('_text')) is None:
+        value = elem.__dict__['_text'] = elem.get_text(strip=True)
+    return value
+
+
+def by_id(soup, element_id):
+    return index(soup).ids.get(element_id)
+
+
+def by_labelledby(soup, label_id):
+    return index(soup).labelledby.get(label_id)
@@ -0,0 +1,180 @@
+"""Parser backends behind the BeautifulSoup trees the scrapers walk.
+
+The extraction code only talks to the bs4 Tag API, so a backend is a tree
+builder: 'html.parser' (pure Python, the historical default), 'lxml' (libxml2)
+or 'lexbor' (selectolax's HTML5 parser, whose tree is replayed into bs4).
+NAV_DOM picks one per run; an unavailable backend falls back to html.parser.
+
+With regions=True (NAV_REGIONS=1 when the caller leaves it open, 0 vetoes it;
+lexbor only) bs4 nodes are built just for header/nav/role=navigation
+subtrees, the elements their aria-controls / data-target attributes point to,
+and the ancestor chain of each; by_id() replays any other element from the
+lexbor tree the first time it is asked for. Such a tree only answers lookups
+confined to those regions: find_next()/find_previous() walks and any choice
+between candidates from the whole page (trigger, panel and primary-nav
+selection) see a different document, so the scrapers parse with regions=False.
+Pages are pruned of script/style/noscript/svg bodies first (see common.prune;
+NAV_PRUNE=0 turns that off).
+"""
+import os
+import time
+from collections import Counter
+
+from bs4 import BeautifulSoup, Comment, Doctype
+from bs4.builder import HTMLTreeBuilder
+
+from . import docindex, prune
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+except ImportError:
+    lxml = None
+
+BACKENDS = ('html.parser', 'lxml', 'lexbor')
+REGION_SELECTOR = 'header, nav, [role="navigation"]'
+TARGET_ATTRS = ('aria-controls', 'aria-owns', 'data-target', 'data-bs-target')
+STATS = Counter()
+
+
+def _id_selector(element_id):
+    return '[id="%s"]' % element_id.replace('\\', '\\\\').replace('"', '\\"')
+
+
+class LexborTreeBuilder(HTMLTreeBuilder):
+    """bs4 tree builder that parses with lexbor and replays its tree as start/data/end events"""
+    NAME = 'lexbor'
+    features = [NAME, 'html', 'fast']
+
+    def __init__(self, regions=False, parser=None, keep=None, **kwargs):
+        super().__init__(**kwargs)
+        self.regions, self.parser, self.keep, self.partial = regions, parser, keep, False
+
+    def prepare_markup(self, markup, user_specified_encoding=None, document_declared_encoding=None, exclude_encodings=None):
+        # Text arrives decoded (see common.encoding); bytes are handed to lexbor as-is
+        yield markup, None, None, False
+
+    def feed(self, markup):
+        if self.parser is None:
+            self.parser = LexborHTMLParser(markup)
+        keep = self.keep if self.keep is not None else self._regions() if self.regions else None
+        if keep is None:
+            self._replay(self.parser.root.parent.child)
+        else:
+            self._replay(self.parser.root.parent.child, {n.mem_id for n in keep}, self._ancestors(keep))
+        self.partial = keep is not None
+        STATS['region_pages'] += self.partial and self.keep is None
+
+    def _regions(self):
+        """Region roots plus the elements their triggers point to; None when the page has no nav region"""
+        if not (regions := self.parser.css(REGION_SELECTOR)):
+            return None
+        targets = {t.lstrip('#') for region in regions for trigger in region.css(', '.join(f"[{a}]" for a in TARGET_ATTRS))
+                   for a in TARGET_ATTRS for t in (trigger.attributes.get(a) or '').split()}
+        return regions + [node for t in targets if t and (node := self.parser.css_first(_id_selector(t)))]
+
+    @staticmethod
+    def _ancestors(nodes):
+        path = set()
+        for node in nodes:
+            while (node := node.parent) is not None and node.mem_id not in path:
+                path.add(node.mem_id)
+        return path
+
+    def _replay(self, node, keep=None, path=()):
+        """Emit bs4 events for node and its siblings; with keep, only kept subtrees and the elements on their ancestor path"""
+        soup, open_elements, full = self.soup, [], keep is None
+        # Iterative walk: deeply nested pages must not hit the recursion limit
+        while node is not None or open_elements:
+            if node is None:
+                node, full = open_elements.pop()
+                soup.endData()
+                soup.handle_endtag(node.tag)
+            elif (tag := node.tag) == '-text':
+                if full:
+                    soup.handle_data(node.text_content)
+            elif tag == '-comment':
+                if full:
+                    soup.endData()
+                    soup.handle_data(node.comment_content or '')
+                    soup.endData(Comment)
+            elif tag == '-doctype':
+                soup.endData()
+                soup.handle_data('html')
+                soup.endData(Doctype)
+            elif tag[0] != '-' and (full or node.mem_id in keep or node.mem_id in path):
+                soup.endData()
+                soup.handle_starttag(tag, None, None, {k: v or '' for k, v in node.attributes.items()})
+                open_elements.append((node, full))
+                full = full or node.mem_id in keep
+                # Template content lives in a separate fragment; html.parser keeps it inline
+                node = self._template_content(node) if tag == 'template' else node.child
+                continue
+            node = node.next
+
+    @staticmethod
+    def _template_content(node):
+        html = node.html
+        inner = html[html.index('>') + 1:-len('</template>')]
+        return LexborHTMLParser(f"<body>{inner}</body>").body.child if inner else None
+
+
+def available():
+    """Backends that can run in this environment"""
+    return [b for b in BACKENDS if b == 'html.parser' or (b == 'lxml' and lxml) or (b == 'lexbor' and LexborHTMLParser)]
+
+
+def backend(name=None):
+    """Requested backend (argument, else NAV_DOM) if installed, else html.parser"""
+    name = name or os.environ.get('NAV_DOM', 'html.parser')
+    return name if name in available() else 'html.parser'
+
+
+def parse(html, name=None, regions=None):
+    """BeautifulSoup tree of html built by the selected backend; regions=None follows NAV_REGIONS, NAV_REGIONS=0 vetoes True"""
+    name, start = backend(name), time.perf_counter()
+    regions = os.environ.get('NAV_REGIONS') == '1' if regions is None else regions and os.environ.get('NAV_REGIONS') != '0'
+    if isinstance(html, str) and os.environ.get('NAV_PRUNE') != '0':
+        html = prune.prune(html)
+    if name == 'lexbor':
+        soup = BeautifulSoup(html, builder=(builder := LexborTreeBuilder(regions=regions)))
+        soup._lexbor, soup._partial, soup._on_demand = builder.parser, builder.partial, {}
+    else:
+        soup = BeautifulSoup(html, name)
+    STATS[name] += 1
+    STATS['seconds'] += time.perf_counter() - start
+    return soup
+
+
+def is_partial(soup):
+    """True if soup was built from the nav regions only"""
+    return bool(getattr(soup, '_partial', False))
+
+
+def by_id(soup, element_id):
+    """soup.find(id=...), loading the element from the full lexbor tree if a region parse left it out"""
+    if not element_id or (found := docindex.by_id(soup, element_id)) is not None:
+        return found
+    if (parser := getattr(soup, '_lexbor', None)) is None:
+        return None
+    if element_id not in soup._on_demand:
+        if node := parser.css_first(_id_selector(element_id)):
+            STATS['on_demand'] += 1
+            part = BeautifulSoup('', builder=LexborTreeBuilder(parser=parser, keep=[node]))
+            soup._on_demand[element_id] = part.find(id=element_id)
+        else:
+            soup._on_demand[element_id] = None
+    return soup._on_demand[element_id]
+
+
+def report():
+    pages = sum(n for b, n in STATS.items() if b in BACKENDS)
+    return ', '.join(f"{b} {STATS[b]}" for b in BACKENDS if STATS[b]) + \
+        (f" ({STATS['seconds'] / pages * 1000:.1f} ms per page)" if pages else 'no pages') + \
+        (f", {STATS['region_pages']} nav-region parses, {STATS['on_demand']} elements loaded on demand"
+         if STATS['region_pages'] else '') + \
+        (f"; {prune.report()}" if prune.STATS['pages'] else '')
@@ -0,0 +1,73 @@
+"""Charset resolution for raw page bytes.
+
+Order: BOM, HTTP Content-Type, <meta charset> / http-equiv in the first 4 KB,
+a strict UTF-8 check, and only then statistical detection on a sample. Pages
+are decoded once here, so neither requests nor the parser sniffs the body.
+"""
+import codecs
+import re
+import threading
+from collections import Counter
+
+META_SCAN = 4096
+DETECT_SAMPLE = 64 * 1024
+BOMS = [(codecs.BOM_UTF8, 'utf-8'), (codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'),
+        (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')]
+HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+META_CHARSET = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+
+STATS, _lock = Counter(), threading.Lock()
+
+
+def _valid(name):
+    try:
+        return codecs.lookup(name.decode('ascii') if isinstance(name, bytes) else name).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+
+
+def declared_encoding(headers, body):
+    """(encoding, source) declared by the BOM, the HTTP header or a <meta> tag, else (None, None)"""
+    for bom, name in BOMS:
+        if body.startswith(bom):
+            return name, 'bom'
+    if (m := HEADER_CHARSET.search(headers.get('content-type', ''))) and (name := _valid(m.group(1))):
+        return name, 'header'
+    if (m := META_CHARSET.search(body, 0, META_SCAN)) and (name := _valid(m.group(1))):
+        return name, 'meta'
+    return None, None
+
+
+def detect(body):
+    """Last resort: statistical detection on a sample of the body"""
+    try:
+        from charset_normalizer import from_bytes
+        return (best := from_bytes(body[:DETECT_SAMPLE]).best()) and best.encoding or 'cp1252'
+    except ImportError:
+        return 'cp1252'
+
+
+def resolve(headers, body):
+    """Encoding to decode body with; records which rule decided it"""
+    name, source = declared_encoding(headers, body)
+    if name is None:
+        try:
+            # final=False: a streamed body may end inside a multi-byte character
+            codecs.getincrementaldecoder('utf-8')().decode(body, final=False)
+            name, source = 'utf-8', 'utf-8 check'
+        except UnicodeDecodeError:
+            name, source = detect(body), 'detected'
+    with _lock:
+        STATS[source] += 1
+    return name
+
+
+def decode(resp):
+    """Response body as text, decoded exactly once with the resolved charset"""
+    return resp.content.decode(resolve(resp.headers, resp.content), 'replace')
+
+
+def report():
+    total = sum(STATS.values())
+    return (', '.join(f"{source} {n}" for source, n in STATS.most_common()) or 'no pages') + \
+        (f" (detection on {STATS['detected'] / total * 100:.1f}% of pages)" if total else '')
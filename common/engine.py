@@ -0,0 +1,42 @@
+"""Asyncio fetch engine with a global connection limit and a per-host limit."""
+import asyncio
+import contextvars
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+class AsyncFetcher:
+    """Run a blocking fetch function concurrently under global and per-host limits.
+
+    Downloads run on a thread pool sized to the global limit, so the scrapers'
+    existing blocking fetch functions are reused unchanged and overlap freely.
+    A limiter (see concurrency.AIMDLimiter) replaces the fixed global limit
+    with an adaptive one that never exceeds max_connections. pace (see
+    fetcher.pace) is awaited before any slot is taken, so politeness waits
+    happen on the event loop instead of on a worker holding a connection.
+    """
+
+    def __init__(self, fetch, max_connections=32, per_host=2, limiter=None, pace=None):
+        self.fetch_fn, self.max_connections, self.per_host, self.limiter = fetch, max_connections, per_host, limiter
+        self.pace = pace
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='fetch')
+        self._loop = None
+
+    def _bind(self):
+        """Create the semaphores for the running event loop (asyncio.run makes a new loop per call)"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._global = self.limiter or asyncio.Semaphore(self.max_connections)
+            self._hosts = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+    async def fetch(self, url):
+        """Fetch url once it is paced and a per-host slot and then a global slot are free"""
+        self._bind()
+        if self.pace:
+            await self.pace(url)
+        # Host slot first so a busy host never parks a global slot
+        async with self._hosts[urlparse(url).netloc.lower()], self._global:
+            # The worker runs in a copy of this context, so it sees the token pace() took
+            return await self._loop.run_in_executor(self._executor, contextvars.copy_context().run, self.fetch_fn, url)
@@ -0,0 +1,220 @@
+"""Fetch pipeline shared by the scrapers: HTTP cache and per-domain pacing in front of the pooled transport.
+
+Set NAV_HTTP_CACHE to another path to move the cache, or to an empty string to disable it.
+Failed requests are retried with backoff; a domain that keeps failing trips its circuit breaker,
+and dead sites are remembered in a negative cache (NAV_NEGATIVE_CACHE, '' disables) until their
+cooldown expires. Timeouts adapt to each domain's latency history; NAV_HEDGE=1 also hedges
+requests to slow domains. robots.txt is fetched once per host per day and honoured, including
+its Crawl-delay; NAV_ROBOTS=0 turns that off. Permanent redirects are remembered (NAV_REDIRECTS,
+'' disables), so a known chain costs one request to its final URL.
+Set NAV_FETCH_MODE=record to save every response to the snapshot archive (NAV_ARCHIVE),
+or NAV_FETCH_MODE=replay to serve every request from it without touching the network.
+"""
+import os
+import threading
+import time
+
+from . import archive, encoding, redirects, resilience
+from .cache import DEFAULT_PATH, HTTPCache
+from .latency import LatencyTracker
+from .navstream import NavRegionWatcher
+from .politeness import DomainScheduler
+from .redirects import RedirectMap
+from .resilience import CircuitBreaker, KnownBad, NegativeCache, RetryPolicy
+from .robots import ROBOTS_TTL, RobotsCache, RobotsDisallowed
+from .transport import shared_transport
+
+
+class Fetcher:
+    """GET with cache lookup, per-domain pacing, conditional revalidation and storage of fresh responses"""
+
+    def __init__(self, transport=None, cache=None, scheduler=None, mode='live', snapshots=None,
+                 retry=None, breaker=None, negative=None, latency=None, hedge=False, robots=True,
+                 redirect_map=None):
+        self.transport, self.cache = transport or shared_transport(), cache
+        self.scheduler = scheduler or DomainScheduler()
+        self.mode, self.snapshots = mode, snapshots  # mode: live, record or replay
+        self.retry, self.breaker, self.negative = retry or RetryPolicy(), breaker or CircuitBreaker(), negative
+        self.latency, self.hedge = latency or LatencyTracker(), hedge
+        self.retries, self.observers = 0, []  # observers: callables(signal, elapsed) told about every attempt
+        self.robots = RobotsCache(self._fetch_robots, self.scheduler) if robots else None
+        self.redirects = redirect_map
+
+    def get(self, url, headers=None, timeout=15, stream=False):
+        """GET url; with stream=True the download may stop once the nav region has arrived"""
+        if self.mode == 'replay':
+            return self.snapshots.latest(url)
+        target = self.redirects.resolve(url) if self.redirects else url
+        if not self.allowed(target, (headers or {}).get('User-Agent', '*')):
+            raise RobotsDisallowed(f"robots.txt disallows {target}")
+        resp = self._get(target, headers, timeout, stream)
+        if target != url and not resp.ok:
+            # The site moved again or dropped the redirect: forget the shortcut and walk the chain
+            self.redirects.forget(url)
+            resp = self._get(url, headers, timeout, stream)
+        if self.redirects and resp.history and not resp.from_cache:
+            self.redirects.learn(resp)
+        if self.mode == 'record':
+            self.snapshots.record(url, resp)
+        return resp
+
+    def jobs(self, urls):
+        """Inputs merged by canonical site (known redirects followed, www. ignored): {input to scrape: [inputs it covers]}"""
+        return redirects.jobs(urls, self.redirects.canonical if self.redirects and self.mode != 'replay' else lambda url: url)
+
+    def allowed(self, url, agent='*'):
+        """robots.txt check; cheap enough to filter link lists with once each host's rules are loaded"""
+        return not self.robots or self.mode == 'replay' or self.robots.allowed(url, agent)
+
+    async def pace(self, url):
+        """Take the politeness token for get(url) up front, unless get() will not reach the network"""
+        if self.mode == 'replay':
+            return
+        # canonical(), not resolve(): get() counts the hops it saves when it resolves the same URL
+        target = self.redirects.canonical(url) if self.redirects else url
+        if self.negative and self.negative.reason(target):
+            return
+        if self.cache and self.cache.lookup(target, allow_truncated=True)[1]:
+            return
+        await self.scheduler.acquire(target)
+
+    def _fetch_robots(self, url):
+        # A stored robots.txt is trusted for a day without revalidating, across runs too. It is
+        # fetched outside the site's accounting: no politeness token, and a missing file (4xx,
+        # read as allow-all) neither trips the breaker, enters the negative cache nor reaches observers
+        return self._get(url, None, 10, False, max_age=ROBOTS_TTL, accounted=False)
+
+    def _get(self, url, headers, timeout, stream, max_age=None, accounted=True):
+        if accounted and self.negative and (reason := self.negative.skip(url)):
+            raise KnownBad(f"skipped {url}: {reason}")
+        entry, fresh = self.cache.lookup(url, allow_truncated=stream, max_age=max_age) if self.cache else (None, False)
+        if entry and fresh:
+            return self.cache.hit(entry)
+        conditional = self.cache.conditional_headers(entry) if entry else {}
+        resp = self._network_get(url, {**(headers or {}), **conditional}, timeout, stream, accounted)
+        if not self.cache:
+            return resp
+        if resp.status == 304 and entry:
+            return self.cache.hit(entry, revalidated=True, elapsed=resp.elapsed)
+        self.cache.store(url, resp)
+        return resp
+
+    def _network_get(self, url, headers, timeout, stream, accounted=True):
+        """Send the request, retrying transient failures and (if accounted) feeding the domain's circuit breaker"""
+        for attempt in range(self.retry.attempts):
+            if accounted:
+                self.breaker.before(url)
+                # Only requests that reach the network spend a politeness token
+                self.scheduler.wait(url)
+            resp, error, start = None, None, time.monotonic()
+            # The first attempt gets the domain's adaptive timeouts, retries the caller's full timeout
+            limits = self.latency.timeouts(url, timeout) if attempt == 0 else timeout
+            send = lambda: self.transport.get(url, headers=headers, timeout=limits,
+                                              watcher=NavRegionWatcher() if stream else None)
+            try:
+                if self.hedge and attempt == 0 and (delay := self.latency.hedge_delay(url)) is not None:
+                    resp = self.latency.hedged(send, delay)
+                else:
+                    resp = send()
+                if (verdict := resilience.classify_response(resp)) is None:
+                    self.latency.observe(url, resp.elapsed)
+            except Exception as e:
+                error, verdict = e, resilience.classify_error(e)
+            if accounted:
+                self.breaker.record(url, verdict is None)
+                for observer in self.observers:
+                    observer(resilience.congestion_signal(resp, error), time.monotonic() - start)
+                if verdict == 'dead' and self.negative:
+                    self.negative.mark(url, str(error)[:200] if error else f"HTTP {resp.status}")
+            if verdict != 'retry' or attempt + 1 == self.retry.attempts:
+                break
+            self.retries += 1
+            time.sleep(self.retry.delay(attempt, resp))
+        if error:
+            raise error
+        return resp
+
+    def mark_unparseable(self, url, scope):
+        """Remember that scraper `scope` could not extract anything from url"""
+        if self.negative and self.mode != 'replay':
+            self.negative.mark(url, 'unparseable', resilience.UNPARSEABLE_TTL, scope)
+
+    def is_known_bad(self, url, scope):
+        """True while url is in the negative cache for this scraper (or dead for everyone)"""
+        return bool(self.negative and self.mode != 'replay' and self.negative.skip(url, scope))
+
+    def report(self):
+        """Per-run summary of the transport and cache counters"""
+        lines = [f"Transport: {self.transport.report()}", f"Politeness: {self.scheduler.report()}"]
+        if self.cache:
+            lines.append(f"HTTP cache: {self.cache.report()}")
+        lines.append(f"Latency: {self.latency.report()}")
+        lines.append(f"Charsets: {encoding.report()}")
+        lines.append(f"Failures: {self.retries} retries, {self.breaker.stats['opened']} circuits opened, "
+                     f"{self.breaker.stats['fast_failed']} fast-failed, "
+                     f"{self.negative.stats['skipped'] if self.negative else 0} skipped as known bad, "
+                     f"{self.negative.stats['marked'] if self.negative else 0} newly marked")
+        if self.redirects:
+            lines.append(f"Redirects: {self.redirects.report()}")
+        if self.robots:
+            lines.append(f"Robots: {self.robots.report()}")
+        if self.snapshots:
+            lines.append(f"Snapshots ({self.mode}): {self.snapshots.report()}")
+        return '\n'.join(lines)
+
+
+_shared, _shared_lock = None, threading.Lock()
+
+
+def shared_fetcher():
+    """Process-wide Fetcher configured from the environment"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            path, mode = os.environ.get('NAV_HTTP_CACHE', DEFAULT_PATH), os.environ.get('NAV_FETCH_MODE', 'live')
+            snapshots = archive.SnapshotArchive(os.environ.get('NAV_ARCHIVE', archive.DEFAULT_PATH)) if mode != 'live' else None
+            negative = os.environ.get('NAV_NEGATIVE_CACHE', resilience.DEFAULT_PATH)
+            redirect_path = os.environ.get('NAV_REDIRECTS', redirects.DEFAULT_PATH)
+            _shared = Fetcher(cache=HTTPCache(path) if path else None, mode=mode, snapshots=snapshots,
+                              negative=NegativeCache(negative) if negative else None, hedge=os.environ.get('NAV_HEDGE') == '1',
+                              robots=os.environ.get('NAV_ROBOTS') != '0',
+                              redirect_map=RedirectMap(redirect_path) if redirect_path else None)
+    return _shared
+
+
+def get(url, **kwargs):
+    """GET url through the shared fetch pipeline"""
+    return shared_fetcher().get(url, **kwargs)
+
+
+async def pace(url):
+    """Await the shared fetcher's politeness token for url; see Fetcher.pace"""
+    await shared_fetcher().pace(url)
+
+
+def observe(callback):
+    """Register callback(signal, elapsed) for every network attempt of the shared fetcher (once per callback)"""
+    if callback not in (observers := shared_fetcher().observers):
+        observers.append(callback)
+
+
+def jobs(urls):
+    """Group scrape inputs that lead to the same site; see Fetcher.jobs"""
+    return shared_fetcher().jobs(urls)
+
+
+def allowed(url, agent='*'):
+    """True if robots.txt lets agent fetch url"""
+    return shared_fetcher().allowed(url, agent)
+
+
+def mark_unparseable(url, scope):
+    shared_fetcher().mark_unparseable(url, scope)
+
+
+def is_known_bad(url, scope):
+    return shared_fetcher().is_known_bad(url, scope)
+
+
+def report():
+    return shared_fetcher().report()
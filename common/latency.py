@@ -0,0 +1,78 @@
+"""Per-domain latency history: adaptive connect/read timeouts and hedged requests.
+
+Timeouts come from the domain's recent latencies (or the whole run's while a
+domain has too few samples), so fast sites fail fast instead of always waiting
+15 s. Retries fall back to the caller's full timeout, which keeps a slow but
+healthy site from turning into a failure. With hedging on, a request still
+running after its domain's p95 gets a second copy and the first response wins.
+"""
+import threading
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .politeness import registrable_domain
+
+WINDOW = 50          # latencies remembered per domain
+MIN_SAMPLES = 3      # before a domain's own history is trusted
+MIN_GLOBAL = 20      # before the run-wide history is used for unknown domains
+MIN_CONNECT, MIN_READ = 2.0, 3.0
+HEDGE_BUDGET = 0.05  # at most this fraction of requests may be hedged
+
+_hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='hedge')
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else None
+
+
+class LatencyTracker:
+    def __init__(self, window=WINDOW):
+        self.window, self.stats, self._lock = window, Counter(), threading.Lock()
+        self._domains = defaultdict(lambda: deque(maxlen=window))
+        self._all = deque(maxlen=window * 20)
+
+    def observe(self, url, seconds):
+        with self._lock:
+            self._domains[registrable_domain(url)].append(seconds)
+            self._all.append(seconds)
+
+    def _history(self, url):
+        with self._lock:
+            own = list(self._domains.get(registrable_domain(url), ()))
+            return own if len(own) >= MIN_SAMPLES else list(self._all) if len(self._all) >= MIN_GLOBAL else []
+
+    def timeouts(self, url, default):
+        """(connect, read) timeout for url, never above the caller's default"""
+        if not (history := self._history(url)):
+            return min(default, 10.0), default
+        self.stats['adaptive'] += 1
+        p50, p95 = percentile(history, 0.5), percentile(history, 0.95)
+        return min(default, max(MIN_CONNECT, 2 * p50 + 1)), min(default, max(MIN_READ, 3 * p95 + 1))
+
+    def hedge_delay(self, url):
+        """Seconds to wait before hedging a request to url, or None if it should not be hedged"""
+        self.stats['requests'] += 1
+        if not (history := self._history(url)) or self.stats['hedged'] >= HEDGE_BUDGET * max(self.stats['requests'], 1):
+            return None
+        return percentile(history, 0.95)
+
+    def hedged(self, send, delay):
+        """Run send(); if it has not finished after `delay` seconds start a second copy and return whichever succeeds first"""
+        first = _hedge_pool.submit(send)
+        if not wait([first], timeout=delay).done:
+            self.stats['hedged'] += 1
+            pending = {first, _hedge_pool.submit(send)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                if winner := next((f for f in done if f.exception() is None), None):
+                    self.stats['hedge_won'] += winner is not first
+                    return winner.result()
+        return first.result()
+
+    def report(self):
+        with self._lock:
+            history = list(self._all)
+        p50, p95, p99 = (percentile(history, p) or 0 for p in (0.5, 0.95, 0.99))
+        return (f"p50 {p50:.2f}s, p95 {p95:.2f}s, p99 {p99:.2f}s over {len(self._domains)} domains, "
+                f"{self.stats['adaptive']} adaptive timeouts, {self.stats['hedged']} hedged ({self.stats['hedge_won']} won by the hedge)")
@@ -0,0 +1,89 @@
+"""Incremental watcher that tells a streaming download when the navigation region has arrived.
+
+The scrapers only read <header>/<nav>/role=navigation regions and the panels
+their triggers point to, so a streamed download can stop once those regions
+have closed (plus a short tail for sibling panels) instead of pulling the
+whole page. Only a region holding a menu (MIN_LINKS links or aria-expanded
+triggers) arms the stop, so a skip-links <nav> ahead of the real header does
+not, and the tail counts markup outside <script>, <style>, <noscript> and
+<svg>, so an inline sprite or bundle cannot use it up. The scrapers stream
+only with NAV_STREAM=1.
+"""
+import codecs
+from html.parser import HTMLParser
+
+from .triage import MIN_LINKS
+
+MAX_BYTES = 768 * 1024   # stop here if a nav region has started
+TAIL_BYTES = 32 * 1024   # keep reading this much after the region closes (sibling panels, late navs)
+REGION_TAGS = {'header', 'nav'}
+TARGET_ATTRS = ('aria-controls', 'aria-owns', 'data-target', 'data-bs-target')
+DEAD_TAGS = {'script', 'style', 'noscript', 'svg'}  # what prune.prune() cuts before parsing
+
+
+class NavRegionWatcher(HTMLParser):
+    """Feed body chunks in order; feed_bytes() returns True once the download can stop"""
+
+    def __init__(self, max_bytes=MAX_BYTES, tail_bytes=TAIL_BYTES):
+        super().__init__(convert_charrefs=False)
+        self.max_bytes, self.tail_bytes = max_bytes, tail_bytes
+        self.decoder = codecs.getincrementaldecoder('utf-8')('replace')  # tags are ASCII in every charset we meet
+        self.received, self.seen_nav, self.closed_at = 0, False, None
+        self.region_tag, self.region_depth, self.region_items = None, 0, 0
+        self.dead_tag, self.dead_depth = None, 0
+        self.live = 0  # characters of markup seen outside DEAD_TAGS
+        self.pending, self.found_ids = set(), set()
+
+    def handle_starttag(self, tag, attrs):
+        if self.dead_tag is not None:
+            self.dead_depth += tag == self.dead_tag
+            return
+        if tag in DEAD_TAGS:
+            self.dead_tag, self.dead_depth = tag, 1
+            return
+        self.live += len(self.get_starttag_text() or '')
+        attrs = dict(attrs)
+        if id_ := attrs.get('id'):
+            self.found_ids.add(id_)
+            self.pending.discard(id_)
+        if self.region_tag is None and (tag in REGION_TAGS or attrs.get('role') == 'navigation'):
+            self.region_tag, self.region_depth, self.region_items, self.seen_nav = tag, 0, 0, True
+        if self.region_tag is None:
+            return
+        self.region_depth += tag == self.region_tag
+        self.region_items += (tag == 'a' and attrs.get('href') is not None) or 'aria-expanded' in attrs
+        # Panels referenced from the region must arrive before we stop
+        self.pending.update(t for a in TARGET_ATTRS if (v := attrs.get(a))
+                            for t in v.lstrip('#').split() if t not in self.found_ids)
+
+    def handle_endtag(self, tag):
+        if self.dead_tag is not None:
+            if tag == self.dead_tag and (depth := self.dead_depth - 1) >= 0:
+                self.dead_depth = depth
+                if depth == 0:
+                    self.dead_tag = None
+            return
+        self.live += len(tag) + 3
+        if tag == self.region_tag and (depth := self.region_depth - 1) >= 0:
+            self.region_depth = depth
+            if depth == 0:
+                self.region_tag = None
+                # Only a region holding a menu arms the stop; a later menu region re-arms it
+                if self.region_items >= MIN_LINKS:
+                    self.closed_at = self.live
+
+    def handle_data(self, data):
+        if self.dead_tag is None:
+            self.live += len(data)
+
+    def feed_bytes(self, chunk):
+        self.received += len(chunk)
+        try:
+            self.feed(self.decoder.decode(chunk))
+        except Exception:
+            return False
+        if (self.closed_at is not None and self.region_tag is None and not self.pending
+                and self.live >= self.closed_at + self.tail_bytes):
+            return True
+        # Without any nav in the budget we keep going: the caller falls back to the full page
+        return self.seen_nav and self.received >= self.max_bytes
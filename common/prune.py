@@ -0,0 +1,56 @@
+"""Pre-parse pruning of subtrees no extractor reads.
+
+<script>, <style> and <noscript> bodies and the drawing inside inline <svg>
+icons are cut out with one regex pass before the parser sees the page. Each
+pruned element is kept as an empty stub with its start tag intact, so sibling
+lookups, aria-* attributes and alt/aria-label text still see the same
+elements; an svg keeps its <title> children because they are icon labels.
+Tag names must end at whitespace, '/' or '>', so custom elements such as
+<svg-icon> or <style-guide> are left alone, and an svg's closing tag is found
+by counting nested <svg> elements.
+"""
+import re
+from collections import Counter
+
+DEAD = re.compile(r'<(script|style|noscript)(?=[\s/>])([^>]*)>.*?</\1\s*>|<svg(?=[\s/>])([^>]*?)(?<!/)>', re.S | re.I)
+SVG_TAG = re.compile(r'<(/?)svg(?=[\s/>])[^>]*?(/?)>', re.I)
+SVG_TITLE = re.compile(r'<title(?=[\s/>])[^>]*>.*?</title\s*>', re.S | re.I)
+
+STATS = Counter()
+
+
+def _svg_end(html, pos):
+    """(start, end) of the tag closing the svg whose start tag ends at pos, counting nested svgs; None if unclosed"""
+    depth = 1
+    for m in SVG_TAG.finditer(html, pos):
+        depth += -1 if m.group(1) else 0 if m.group(2) else 1
+        if not depth:
+            return m.span()
+    return None
+
+
+def prune(html):
+    """html with script/style/noscript emptied and svg drawings removed"""
+    parts, pos = [], 0
+    while m := DEAD.search(html, pos):
+        parts.append(html[pos:m.start()])
+        if m.group(1):
+            STATS[m.group(1).lower()] += 1
+            parts.append(f"<{m.group(1)}{m.group(2)}></{m.group(1)}>")
+            pos = m.end()
+        elif close := _svg_end(html, m.end()):
+            STATS['svg'] += 1
+            parts.append(f"<svg{m.group(3)}>{''.join(SVG_TITLE.findall(html, m.end(), close[0]))}</svg>")
+            pos = close[1]
+        else:  # unclosed svg: left for the parser
+            parts.append(m.group(0))
+            pos = m.end()
+    pruned = ''.join(parts) + html[pos:]
+    STATS['pages'] += 1
+    STATS['chars_removed'] += len(html) - len(pruned)
+    return pruned
+
+
+def report():
+    return (f"{STATS['chars_removed'] / 1e6:.2f} MB pruned from {STATS['pages']} pages "
+            f"({', '.join(f'{STATS[t]} {t}' for t in ('svg', 'script', 'style', 'noscript'))})")
@@ -0,0 +1,85 @@
+"""Persistent map of permanent redirects (301/308), so known chains resolve locally.
+
+The fetcher requests the end of a known chain directly and learns new hops
+from every response's history. Scrape inputs that resolve to the same
+canonical page (e.g. stripe.com and www.stripe.com) are merged into one job.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'redirects.sqlite')
+
+PERMANENT = {301, 308}
+REDIRECT_TTL = 30 * 24 * 3600  # permanent redirects are still re-learned monthly
+MAX_HOPS = 10
+
+
+def site_key(url):
+    """Host without 'www.' plus path: the identity two inputs must share to be one scrape job"""
+    parts = urlparse(url)
+    host = (parts.hostname or '').lower()
+    return (host[4:] if host.startswith('www.') else host) + parts.path.rstrip('/')
+
+
+def jobs(urls, resolve=lambda url: url):
+    """Group inputs by canonical site: {first input: [inputs merged into it]}, in input order"""
+    groups = {}
+    for url in urls:
+        groups.setdefault(site_key(resolve(url)), []).append(url)
+    return {group[0]: group for group in groups.values()}
+
+
+class RedirectMap:
+    """url -> permanent redirect target, loaded into memory once and written through to SQLite"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path, self.stats, self._lock = path, Counter(), threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._db as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE IF NOT EXISTS redirects (url TEXT PRIMARY KEY, target TEXT, status INTEGER, until REAL)')
+            self._map = dict(db.execute('SELECT url, target FROM redirects WHERE until > ?', (time.time(),)))
+
+    def _chain(self, url):
+        chain = [url]
+        while (target := self._map.get(chain[-1])) and target not in chain and len(chain) <= MAX_HOPS:
+            chain.append(target)
+        return chain
+
+    def canonical(self, url):
+        """End of the known redirect chain starting at url (url itself if none is known)"""
+        return self._chain(url)[-1]
+
+    def resolve(self, url):
+        """canonical(), counted as a request that skips the chain"""
+        if len(chain := self._chain(url)) > 1:
+            self.stats['resolved'] += 1
+            self.stats['hops_saved'] += len(chain) - 1
+        return chain[-1]
+
+    def learn(self, resp):
+        """Remember the permanent hops of a live response's redirect history"""
+        hops = list(zip(resp.history, resp.history[1:] + [resp.url], resp.history_status))
+        if new := [(src, dst, status) for src, dst, status in hops if status in PERMANENT and self._map.get(src) != dst]:
+            with self._lock, self._db as db:
+                db.executemany('INSERT OR REPLACE INTO redirects VALUES (?, ?, ?, ?)',
+                               [(src, dst, status, time.time() + REDIRECT_TTL) for src, dst, status in new])
+                self._map.update((src, dst) for src, dst, _ in new)
+            self.stats['learned'] += len(new)
+
+    def forget(self, url):
+        """Drop a mapping whose target stopped working"""
+        with self._lock, self._db as db:
+            db.execute('DELETE FROM redirects WHERE url = ?', (url,))
+            self._map.pop(url, None)
+        self.stats['forgotten'] += 1
+
+    def report(self):
+        s = self.stats
+        return (f"{len(self._map)} known, {s['learned']} learned, {s['resolved']} requests sent straight to the target "
+                f"({s['hops_saved']} hops saved), {s['forgotten']} forgotten")
@@ -0,0 +1,142 @@
+"""Local stand-in web server for load-testing the fetch + extract pipeline.
+
+Serves saved pages under their real (or made-up) hostnames: every snapshot in
+the archive is served at its own host and path, and --page maps a host
+pattern to a file. Latency, bandwidth and injected errors are configurable;
+--workers forks SO_REUSEPORT processes so one box can serve thousands of
+requests per second. Point a scraper at it with NAV_RESOLVE:
+
+    python -m common.replayserver --port 8800 --page '*.test=app/stripe_sample.html' --latency 0.05 --workers 4
+    NAV_RESOLVE='*.test=127.0.0.1' NAV_ROBOTS=0 python ...   # then fetch http://site1.test:8800/ ...
+"""
+import argparse
+import asyncio
+import fnmatch
+import json
+import multiprocessing
+import os
+import random
+import time
+import zlib
+from urllib.parse import urlparse
+
+from . import archive
+
+CHUNK_SIZE = 16 * 1024
+REASONS = {200: 'OK', 404: 'Not Found', 429: 'Too Many Requests', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def load_pages(archive_path, pages):
+    """(exact, patterns): {(host, path): (status, headers, body)} from the archive, [(host_pattern, page)] from --page"""
+    exact = {}
+    if archive_path and os.path.exists(archive_path):
+        # Oldest first, so the newest snapshot of a URL wins
+        for url, status, headers, content in archive.SnapshotArchive(archive_path)._db().execute(
+                'SELECT url, status, headers, content FROM snapshots ORDER BY fetched_at'):
+            parts = urlparse(url)
+            exact[(parts.hostname, parts.path or '/')] = (status, json.loads(headers), zlib.decompress(content))
+    patterns = []
+    for spec in pages:
+        pattern, path = spec.split('=', 1)
+        with open(path, 'rb') as f:
+            patterns.append((pattern, (200, {'content-type': 'text/html; charset=utf-8'}, f.read())))
+    return exact, patterns
+
+
+class ReplayServer:
+    def __init__(self, exact, patterns, latency=0.0, jitter=0.0, bandwidth=0, error_rate=0.0, error_status='503'):
+        self.exact, self.patterns = exact, patterns
+        self.latency, self.jitter, self.bandwidth = latency, jitter, bandwidth  # bandwidth: bytes/s per response, 0 = unlimited
+        self.error_rate, self.error_status = error_rate, error_status            # error_status: an HTTP status or 'reset'
+        self.requests, self.started = 0, time.monotonic()
+
+    def page(self, host, path):
+        if hit := self.exact.get((host, path)) or self.exact.get((host, path.rstrip('/') or '/')):
+            return hit
+        if path == '/':
+            return next((page for pattern, page in self.patterns if fnmatch.fnmatch(host, pattern)), None)
+        return None
+
+    async def handle(self, reader, writer):
+        try:
+            while request := await reader.readuntil(b'\r\n\r\n'):
+                lines = request.decode('latin-1').split('\r\n')
+                path = lines[0].split(' ')[1].split('?')[0]
+                headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(':') for line in lines[1:] if line)}
+                host = headers.get('host', '').rsplit(':', 1)[0]
+                self.requests += 1
+                if self.latency or self.jitter:
+                    await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+                if self.error_rate and random.random() < self.error_rate:
+                    if self.error_status == 'reset':
+                        writer.transport.abort()
+                        return
+                    status, body, page_headers = int(self.error_status), b'', {'retry-after': '1'}
+                elif page := self.page(host, path):
+                    status, page_headers, body = page
+                else:
+                    status, body, page_headers = 404, b'not found', {}
+                head = [f"HTTP/1.1 {status} {REASONS.get(status, 'Status')}",
+                        f"Content-Type: {page_headers.get('content-type', 'text/html; charset=utf-8')}",
+                        f"Content-Length: {len(body)}", 'Connection: keep-alive']
+                head += [f"Retry-After: {page_headers['retry-after']}"] if 'retry-after' in page_headers else []
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+                await self.send(writer, body)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def send(self, writer, body):
+        if not self.bandwidth:
+            writer.write(body)
+            return await writer.drain()
+        for i in range(0, len(body), CHUNK_SIZE):
+            writer.write(body[i:i + CHUNK_SIZE])
+            await writer.drain()
+            await asyncio.sleep(min(CHUNK_SIZE, len(body) - i) / self.bandwidth)
+
+    async def report(self, every=5):
+        while True:
+            await asyncio.sleep(every)
+            if self.requests:
+                print(f"[{os.getpid()}] {self.requests} requests, {self.requests / (time.monotonic() - self.started):.0f}/s", flush=True)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, reuse_port=True, backlog=4096)
+        asyncio.get_running_loop().create_task(self.report())
+        async with server:
+            await server.serve_forever()
+
+
+def run(args):
+    exact, patterns = load_pages(args.archive, args.page)
+    server = ReplayServer(exact, patterns, args.latency, args.jitter, args.bandwidth, args.error_rate, args.error_status)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--archive', default=os.environ.get('NAV_ARCHIVE', archive.DEFAULT_PATH), help="snapshot archive to serve ('' for none)")
+    parser.add_argument('--page', action='append', default=[], metavar='HOST_PATTERN=FILE', help="serve FILE as / of every matching host")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="up to this many extra random seconds")
+    parser.add_argument('--bandwidth', type=float, default=0, help="bytes/s per response (0 = unlimited)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with --error-status")
+    parser.add_argument('--error-status', default='503', help="HTTP status to inject, or 'reset' to drop the connection")
+    parser.add_argument('--workers', type=int, default=1, help="processes sharing the port via SO_REUSEPORT")
+    args = parser.parse_args()
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} worker(s)", flush=True)
+    workers = [multiprocessing.Process(target=run, args=(args,), daemon=True) for _ in range(args.workers - 1)]
+    for w in workers:
+        w.start()
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
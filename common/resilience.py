@@ -0,0 +1,153 @@
+"""Failure handling for the fetch pipeline: classified retries, per-domain circuit breakers and a
+persistent negative cache of sites that are known to be dead or unparseable.
+"""
+import os
+import random
+import re
+import socket
+import sqlite3
+import ssl
+import threading
+import time
+from collections import Counter
+
+from .politeness import registrable_domain
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'negative.sqlite')
+
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+DEAD_STATUSES = {404, 410}
+# Errors are classified by exception type; messages carry the host and URL, so only phrases
+# that cannot appear in one are matched there
+DEAD_TYPES = (socket.gaierror, ssl.SSLError)
+DEAD_NAMES = re.compile(r'NameResolution|SSL|Certificate|TooManyRedirects')  # requests/urllib3/httpx class names
+DEAD_MESSAGES = re.compile(r'Name or service not known|nodename nor servname|getaddrinfo failed|No address associated|'
+                           r'CERTIFICATE_VERIFY_FAILED|Exceeded \d+ redirects')
+RETRY_TYPES = (TimeoutError, ConnectionError)
+RETRY_NAMES = re.compile(r'Timeout|Connect|RemoteProtocol|ReadError|IncompleteRead|ChunkedEncoding')
+RETRY_MESSAGES = re.compile(r'timed out|reset by peer|Broken pipe')
+
+DEAD_TTL = 24 * 3600             # skip dead sites for a day
+UNPARSEABLE_TTL = 7 * 24 * 3600  # and sites no extractor could handle for a week
+
+
+class FetchError(Exception):
+    """Base class for fetches refused by the pipeline itself"""
+
+
+class CircuitOpen(FetchError):
+    """The domain failed repeatedly and is being failed fast until its cooldown ends"""
+
+
+class KnownBad(FetchError):
+    """The negative cache says this site is dead or unparseable"""
+
+
+def classify_response(resp):
+    """None for a usable response, else 'retry', 'dead' or 'fail'"""
+    if resp.status < 400:
+        return None
+    return 'retry' if resp.status in RETRY_STATUSES else 'dead' if resp.status in DEAD_STATUSES else 'fail'
+
+
+def classify_error(exc):
+    """'dead' for errors a retry cannot fix (DNS, TLS, redirect loops), 'retry' for transient ones, else 'fail'"""
+    chain, e = [], exc
+    while e is not None and len(chain) < 8:
+        chain.append(e)
+        e = e.__cause__ or e.__context__
+    names, text = ' '.join(type(e).__name__ for e in chain), ' '.join(map(str, chain))
+    # A timeout is transient even when it happened during a TLS handshake
+    if any(isinstance(e, TimeoutError) for e in chain) or 'Timeout' in names:
+        return 'retry'
+    if any(isinstance(e, DEAD_TYPES) for e in chain) or DEAD_NAMES.search(names) or DEAD_MESSAGES.search(text):
+        return 'dead'
+    if any(isinstance(e, RETRY_TYPES) for e in chain) or RETRY_NAMES.search(names) or RETRY_MESSAGES.search(text):
+        return 'retry'
+    return 'fail'
+
+
+def congestion_signal(resp=None, error=None):
+    """Outcome of one attempt as seen by the concurrency controller: None, 'throttle', 'timeout' or 'error'
+
+    A 4xx other than 429 is the page's answer, not a sign of overload, so it counts as a success.
+    """
+    if error is not None:
+        return 'timeout' if re.search(r'Timeout|timed out', f"{type(error).__name__} {error}", re.I) else 'error'
+    return 'throttle' if resp.status in (429, 503) else 'error' if resp.status >= 500 else None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honouring Retry-After up to the cap"""
+
+    def __init__(self, attempts=3, base=0.5, cap=10.0):
+        self.attempts, self.base, self.cap = attempts, base, cap
+
+    def delay(self, attempt, resp=None):
+        if resp is not None and (after := resp.headers.get('retry-after', '')).isdigit():
+            return min(float(after), self.cap)
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Per registrable domain: open after `threshold` consecutive failures, probe again after `cooldown` seconds"""
+
+    def __init__(self, threshold=3, cooldown=300):
+        self.threshold, self.cooldown = threshold, cooldown
+        self.stats, self._state, self._lock = Counter(), {}, threading.Lock()  # domain -> [failures, opened_at]
+
+    def before(self, url):
+        """Raise CircuitOpen while the domain's breaker is open; after the cooldown one probe goes through"""
+        domain = registrable_domain(url)
+        with self._lock:
+            failures, opened_at = self._state.get(domain, (0, None))
+            if opened_at is None:
+                return
+            if time.monotonic() - opened_at < self.cooldown:
+                self.stats['fast_failed'] += 1
+                raise CircuitOpen(f"circuit open for {domain}")
+            self._state[domain] = (failures, time.monotonic())  # half-open: let this one request probe
+
+    def record(self, url, ok):
+        domain = registrable_domain(url)
+        with self._lock:
+            if ok:
+                self._state.pop(domain, None)
+                return
+            failures = self._state.get(domain, (0, None))[0] + 1
+            opened = failures >= self.threshold
+            self.stats['opened'] += opened and failures == self.threshold
+            self._state[domain] = (failures, time.monotonic() if opened else None)
+
+
+class NegativeCache:
+    """Persistent (scope, url) -> reason with an expiry; scope 'net' is shared by every scraper"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path, self.stats, self._local = path, Counter(), threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._db() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS negative (scope TEXT, url TEXT, reason TEXT, until REAL, PRIMARY KEY (scope, url))')
+
+    def _db(self):
+        if (db := getattr(self._local, 'db', None)) is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+        return db
+
+    def reason(self, url, scope='net'):
+        """Why url should be skipped, or None once its cooldown has expired"""
+        row = self._db().execute('SELECT reason FROM negative WHERE url = ? AND scope IN (?, ?) AND until > ?',
+                                 (url, 'net', scope, time.time())).fetchone()
+        return row and row[0]
+
+    def skip(self, url, scope='net'):
+        """reason(), counting a skip when there is one; call it where the request is actually skipped"""
+        if reason := self.reason(url, scope):
+            self.stats['skipped'] += 1
+        return reason
+
+    def mark(self, url, reason, ttl=DEAD_TTL, scope='net'):
+        with self._db() as db:
+            db.execute('INSERT OR REPLACE INTO negative VALUES (?, ?, ?, ?)', (scope, url, reason, time.time() + ttl))
+        self.stats['marked'] += 1
@@ -0,0 +1,131 @@
+"""robots.txt support: fetched once per host per TTL, compiled into a single regex per host.
+
+The rules of the matching group are compiled into one alternation ordered by
+specificity (longest rule first, Allow before Disallow on ties), so a single
+re.match picks the winning rule exactly as RFC 9309 prescribes. Crawl-delay is
+pushed into the per-domain politeness scheduler.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from .politeness import registrable_domain
+from .resilience import FetchError
+
+ROBOTS_TTL = 24 * 3600
+UNREACHABLE_TTL = 600  # a 5xx/unreachable robots.txt means "disallow all", but only briefly
+
+
+class RobotsDisallowed(FetchError):
+    """robots.txt does not allow fetching this URL"""
+
+
+def _pattern(path):
+    """robots path pattern ('*' wildcard, '$' end anchor) -> regex source"""
+    anchored = path.endswith('$')
+    return ''.join('.*' if ch == '*' else re.escape(ch) for ch in path.rstrip('$')) + ('$' if anchored else '')
+
+
+def product_token(agent):
+    """Crawler name that robots.txt groups are matched against: the User-Agent's first product token, lowercased"""
+    return m.group().lower() if (m := re.match(r'[A-Za-z_-]+', agent.strip())) else '*'
+
+
+def parse(text, agent):
+    """(rules, crawl_delay) of the group whose User-agent equals agent's product token (else '*'); rules are (allow, path)"""
+    groups, agents, in_rules, agent = {}, [], False, product_token(agent)
+    for line in text.splitlines():
+        if not (line := line.split('#', 1)[0].strip()) or ':' not in line:
+            continue
+        key, value = (p.strip() for p in line.split(':', 1))
+        key = key.lower()
+        if key == 'user-agent':
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(product_token(value))
+            for a in agents:
+                groups.setdefault(a, {'rules': [], 'delay': None})
+        elif key in ('allow', 'disallow') and agents:
+            in_rules = True
+            if value:
+                for a in agents:
+                    groups[a]['rules'].append((key == 'allow', value))
+        elif key == 'crawl-delay' and agents:
+            in_rules = True
+            try:
+                for a in agents:
+                    groups[a]['delay'] = float(value)
+            except ValueError:
+                pass
+    group = groups.get(agent) or groups.get('*', {'rules': [], 'delay': None})
+    return group['rules'], group['delay']
+
+
+class RobotsRules:
+    """Compiled rule set for one host"""
+
+    def __init__(self, rules=(), crawl_delay=None, disallow_all=False):
+        self.crawl_delay, self.disallow_all = crawl_delay, disallow_all
+        ordered = sorted(rules, key=lambda r: (-len(r[1]), not r[0]))
+        self.regex = re.compile('|'.join(f"(?P<{'a' if allow else 'd'}{i}>{_pattern(path)})"
+                                         for i, (allow, path) in enumerate(ordered))) if ordered else None
+
+    def allowed(self, path):
+        if self.disallow_all:
+            return False
+        return not (self.regex and (m := self.regex.match(path)) and m.lastgroup[0] == 'd')
+
+
+class RobotsCache:
+    """(origin, user agent) -> RobotsRules, loaded through `fetch(url) -> Response` at most once per TTL"""
+
+    def __init__(self, fetch, scheduler=None, ttl=ROBOTS_TTL):
+        self.fetch, self.scheduler, self.ttl = fetch, scheduler, ttl
+        self.stats, self._hosts, self._lock = Counter(), {}, threading.Lock()
+        self._loading = {}  # key -> Lock, so concurrent requests to a new host trigger one robots fetch
+
+    def rules(self, url, agent='*'):
+        parts = urlparse(url)
+        key = (f"{parts.scheme}://{parts.netloc}", agent)
+        if (entry := self._hosts.get(key)) and entry[0] > time.monotonic():
+            return entry[1]
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            if (entry := self._hosts.get(key)) and entry[0] > time.monotonic():
+                return entry[1]
+            rules, ttl = self._load(key[0] + '/robots.txt', agent)
+            self._hosts[key] = (time.monotonic() + ttl, rules)
+        if rules.crawl_delay and self.scheduler:
+            domain = registrable_domain(url)
+            self.scheduler.delays[domain] = max(self.scheduler.delays.get(domain, self.scheduler.delay), rules.crawl_delay)
+        return rules
+
+    def _load(self, robots_url, agent):
+        self.stats['fetched'] += 1
+        try:
+            resp = self.fetch(robots_url)
+        except Exception:
+            return RobotsRules(disallow_all=True), UNREACHABLE_TTL
+        if resp.status >= 500:
+            return RobotsRules(disallow_all=True), UNREACHABLE_TTL
+        if resp.status >= 400:
+            return RobotsRules(), self.ttl  # no robots.txt: everything is allowed
+        return RobotsRules(*parse(resp.content.decode('utf-8', 'replace'), agent)), self.ttl
+
+    def allowed(self, url, agent='*'):
+        """True if robots.txt lets `agent` fetch url; the robots.txt files themselves are always allowed"""
+        parts = urlparse(url)
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        if path == '/robots.txt':
+            return True
+        ok = self.rules(url, agent).allowed(path)
+        self.stats['checked'] += 1
+        self.stats['disallowed'] += not ok
+        return ok
+
+    def report(self):
+        s = self.stats
+        return f"{s['fetched']} robots.txt fetched, {s['checked']} URLs checked, {s['disallowed']} disallowed"
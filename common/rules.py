@@ -0,0 +1,35 @@
+"""Rule lists (skip patterns, user-menu indicators, keywords) compiled once into a single regex.
+
+search() answers "does any rule match" with one scan. matches() reports every
+rule that matches anywhere: the combined regex finds each position where some
+rule starts, and one probe of optional lookaheads there tells which rules
+match at that position, so overlapping rules are all counted.
+"""
+import re
+
+
+class RuleSet:
+    """rules: regex patterns, or plain substrings with literal=True; matching is case-insensitive"""
+
+    def __init__(self, rules, literal=False):
+        self.rules = list(rules)
+        sources = [re.escape(r) if literal else r for r in self.rules]
+        self.any = re.compile('|'.join(f"(?:{s})" for s in sources), re.I)
+        # Named groups, because the rules may contain capturing groups of their own
+        self.names = [f"r{i}" for i in range(len(sources))]
+        self.probe = re.compile(''.join(f"(?=(?P<{n}>{s}))?" for n, s in zip(self.names, sources)), re.I)
+
+    def search(self, text):
+        return self.any.search(text) is not None
+
+    def matches(self, text):
+        """Every rule that matches somewhere in text, in rule order"""
+        found, pos = set(), 0
+        while len(found) < len(self.rules) and (m := self.any.search(text, pos)):
+            groups = self.probe.match(text, m.start()).groupdict()
+            found.update(i for i, n in enumerate(self.names) if groups[n] is not None)
+            pos = m.start() + 1
+        return [self.rules[i] for i in sorted(found)]
+
+    def count(self, text):
+        return len(self.matches(text))
@@ -0,0 +1,192 @@
+"""Shared HTTP transport: pooled keep-alive connections, cached DNS and optional HTTP/2.
+
+Every scraper fetches through shared_transport(), so repeat hits on a host
+(www/non-www pairs, deep crawls) reuse an open connection instead of paying
+for a new TCP+TLS handshake and DNS lookup each time.
+NAV_RESOLVE="stripe.com=127.0.0.1,*.test=127.0.0.1" pins hostnames to addresses
+(e.g. to point a run at common.replayserver).
+The default client is a requests session: across hundreds of pooled hosts it
+opens new connections much faster than httpx. NAV_HTTP2=1 switches
+to httpx with HTTP/2 (needs httpx and h2), which pays off for deep crawls of a
+few hosts.
+"""
+import fnmatch
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:  # HTTP/2 needs httpx plus the h2 package
+    import h2  # noqa: F401
+    import httpx
+except ImportError:
+    httpx = None
+
+POOL_HOSTS = 256     # hosts whose connection pools are kept open
+POOL_PER_HOST = 4    # keep-alive connections kept per host
+DNS_TTL = 300        # seconds a resolved address is reused
+CHUNK_SIZE = 16 * 1024
+
+DNS_STATS = Counter()
+_dns_cache, _dns_lock = {}, threading.Lock()
+_system_getaddrinfo = socket.getaddrinfo
+RESOLVE_OVERRIDES = dict(pair.split('=', 1) for pair in os.environ.get('NAV_RESOLVE', '').split(',') if '=' in pair)
+
+
+def _cached_getaddrinfo(host, port, *args, **kwargs):
+    """socket.getaddrinfo with a TTL cache; every call here is a new connection being opened"""
+    if RESOLVE_OVERRIDES and isinstance(host, str):
+        host = next((ip for pattern, ip in RESOLVE_OVERRIDES.items() if fnmatch.fnmatch(host, pattern)), host)
+    key, now = (host, port, args, tuple(sorted(kwargs.items()))), time.monotonic()
+    with _dns_lock:
+        DNS_STATS['connections'] += 1
+        if (hit := _dns_cache.get(key)) and hit[0] > now:
+            DNS_STATS['hits'] += 1
+            return hit[1]
+    result = _system_getaddrinfo(host, port, *args, **kwargs)
+    with _dns_lock:
+        _dns_cache[key] = (now + DNS_TTL, result)
+    return result
+
+
+def install_dns_cache():
+    """Route all name resolution in this process through the DNS cache"""
+    socket.getaddrinfo = _cached_getaddrinfo
+
+
+class HTTPStatusError(Exception):
+    """Raised by Response.raise_for_status for 4xx/5xx responses"""
+
+
+@dataclass
+class Response:
+    url: str
+    status: int
+    headers: dict
+    content: bytes
+    encoding: Optional[str] = None
+    elapsed: float = 0.0
+    history: List[str] = field(default_factory=list)
+    history_status: List[int] = field(default_factory=list)  # status of each redirect in history
+    http_version: str = 'HTTP/1.1'
+    from_cache: bool = False
+    truncated: bool = False  # streamed download stopped once the nav region had arrived
+
+    @property
+    def ok(self):
+        return self.status < 400
+
+    @property
+    def text(self):
+        """Body decoded the way requests' Response.text does it (declared charset, else detection)"""
+        r = requests.models.Response()
+        r._content, r.encoding = self.content, self.encoding
+        return r.text
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPStatusError(f"{self.status} for url: {self.url}")
+
+
+class Transport:
+    """One pooled, keep-alive HTTP client shared by every fetch path"""
+
+    def __init__(self, http2=None, pool_hosts=POOL_HOSTS, pool_per_host=POOL_PER_HOST):
+        http2 = os.environ.get('NAV_HTTP2') == '1' if http2 is None else http2
+        self.http2 = bool(http2 and httpx)
+        self.stats, self._lock = Counter(), threading.Lock()
+        if self.http2:
+            self.client = httpx.Client(http2=True, follow_redirects=True, limits=httpx.Limits(
+                max_connections=pool_hosts * pool_per_host, max_keepalive_connections=pool_hosts * pool_per_host))
+        else:
+            self.client = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_per_host)
+            self.client.mount('http://', adapter)
+            self.client.mount('https://', adapter)
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def get(self, url, headers=None, timeout=15, watcher=None):
+        """GET url (following redirects) and return a Response. timeout may be a (connect, read) tuple.
+
+        With a watcher (see navstream) the body is streamed and the connection
+        dropped as soon as watcher.feed_bytes() says the rest is not needed.
+        """
+        start = time.monotonic()
+        if self.http2 and isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        if watcher is None:
+            r = self.client.get(url, headers=headers, timeout=timeout)
+            resp = self._response(r, start, r.content)
+        elif self.http2:
+            with self.client.stream('GET', url, headers=headers, timeout=timeout) as r:
+                resp = self._response(r, start, *self._read(r, r.iter_bytes(CHUNK_SIZE), watcher))
+        else:
+            with self.client.get(url, headers=headers, timeout=timeout, stream=True) as r:
+                resp = self._response(r, start, *self._read(r, r.iter_content(CHUNK_SIZE), watcher))
+        self.count('requests')
+        self.count(resp.http_version)
+        return resp
+
+    def _read(self, r, chunks, watcher):
+        """Read body chunks until the watcher is satisfied; returns (body, truncated)"""
+        if r.status_code != 200 or 'html' not in r.headers.get('content-type', 'text/html'):
+            return b''.join(chunks), False
+        body, stopped = bytearray(), False
+        for chunk in chunks:
+            body += chunk
+            if stopped := watcher.feed_bytes(chunk):
+                break
+        self.count('streamed')
+        self.count('bytes_streamed', len(body))
+        if stopped:
+            self.count('stopped_early')
+            if (length := r.headers.get('content-length', '')).isdigit():
+                self.count('bytes_skipped', max(int(length) - len(body), 0))
+        return bytes(body), stopped
+
+    def _response(self, r, start, content, truncated=False):
+        headers = {k.lower(): v for k, v in r.headers.items()}
+        if self.http2:
+            return Response(str(r.url), r.status_code, headers, content, r.charset_encoding, time.monotonic() - start,
+                            [str(h.url) for h in r.history], [h.status_code for h in r.history], r.http_version,
+                            truncated=truncated)
+        return Response(r.url, r.status_code, headers, content, r.encoding, time.monotonic() - start,
+                        [h.url for h in r.history], [h.status_code for h in r.history], truncated=truncated)
+
+    def report(self):
+        """One-line summary of connection reuse and DNS cache effectiveness"""
+        reqs, conns, dns_hits = self.stats['requests'], DNS_STATS['connections'], DNS_STATS['hits']
+        reuse = 1 - conns / reqs if reqs else 0
+        return (f"{reqs} requests, {conns} new connections, pool hit rate {max(reuse, 0) * 100:.0f}%, "
+                f"DNS cache hit rate {dns_hits / conns * 100 if conns else 0:.0f}%, "
+                f"HTTP/2 {self.stats['HTTP/2'] / reqs * 100 if reqs else 0:.0f}%"
+                + (f", streamed {self.stats['streamed']} ({self.stats['stopped_early']} stopped after the nav, "
+                   f"{self.stats['bytes_streamed'] / 1e6:.2f} MB read, ~{self.stats['bytes_skipped'] / 1e6:.2f} MB skipped)"
+                   if self.stats['streamed'] else ''))
+
+
+_shared, _shared_lock = None, threading.Lock()
+
+
+def shared_transport():
+    """Process-wide Transport, created on first use"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            install_dns_cache()
+            _shared = Transport()
+    return _shared
+
+
+def get(url, **kwargs):
+    """GET url through the shared transport"""
+    return shared_transport().get(url, **kwargs)
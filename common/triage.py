@@ -0,0 +1,59 @@
+"""Raw-HTML triage: choose how to extract a page before parsing it.
+
+A quick scan counts nav landmarks, disclosure triggers and links. Pages with
+no landmarks and almost no links are
+JS-only shells and are rejected unparsed; the rest are parsed in full (trigger,
+panel and primary-nav selection all look across the whole document).
+Once a page is parsed, markers() looks for known menu-framework class names on
+its nav/header regions; they select the matching site-specific patterns even on
+domains we have no config for.
+"""
+import re
+from collections import Counter
+
+from . import docindex
+
+# A page with fewer links than this and no nav landmark has no menu worth extracting; a
+# single panel may still hold fewer (see is_valid_panel in app)
+MIN_LINKS = 3
+
+# Menu frameworks recognisable from class names, mapped to the site config that handles them
+MARKERS = {'NavigationMenu_': 'asana.com', 'global-nav-tab': 'hubspot.com', 'Header-nav-folder': 'squarespace.com'}
+
+# Patterns that start with '<' (or a case-sensitive literal) let the regex engine skip ahead quickly
+NAV = re.compile(r'<nav\b', re.I)
+HEADER = re.compile(r'<header\b', re.I)
+ROLE_NAV = re.compile(r'role\s*=\s*["\']?navigation')
+LINK = re.compile(r'<a\s[^>]*?href\s*=', re.I)
+JS_ROOT = re.compile(r'id\s*=\s*["\'](?:root|app|__next|__nuxt|svelte)["\'][^>]*>\s*</div>|enable javascript')
+
+STATS = Counter()
+
+
+def triage(html):
+    """{'strategy': 'shell' | 'landmarks' | 'full', 'reason': str, 'counts': Counter}"""
+    counts = Counter(nav=len(NAV.findall(html)), header=len(HEADER.findall(html)), role_nav=len(ROLE_NAV.findall(html)),
+                     aria_expanded=html.count('aria-expanded'), link=len(LINK.findall(html)))
+    landmarks = counts['nav'] + counts['header'] + counts['role_nav']
+    if counts['link'] < MIN_LINKS and not landmarks:
+        strategy, reason = 'shell', f"{counts['link']} links, no nav landmarks" + (', JS app root' if JS_ROOT.search(html.lower()) else '')
+    elif landmarks:
+        strategy, reason = 'landmarks', f"{landmarks} nav landmarks, {counts['aria_expanded']} aria-expanded"
+    else:
+        strategy, reason = 'full', f"no nav landmarks, {counts['link']} links"
+    STATS[strategy] += 1
+    return {'strategy': strategy, 'reason': reason, 'counts': counts}
+
+
+def in_region(elem):
+    """True if elem is, or sits inside, a header, nav or role=navigation element"""
+    return any(e.name in ('header', 'nav') or e.get('role') == 'navigation' for e in (elem, *elem.parents) if e.name)
+
+
+def markers(soup):
+    """Site configs whose framework class marker is on an element in the page's nav/header regions (never script or CSS text)"""
+    return [site for marker, site in MARKERS.items() if any(in_region(e) for e in docindex.find_all(soup, re.escape(marker)))]
+
+
+def report():
+    return ', '.join(f"{STATS[s]} {s}" for s in ('landmarks', 'full', 'shell'))
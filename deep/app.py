@@ -425,13 +425,21 @@
 
 
 
-import requests
-from bs4 import BeautifulSoup
-import json, re, time
+import asyncio, json, os, re, sys, time
+from bisect import bisect_right
+from collections import Counter
+from itertools import takewhile
 from urllib.parse import urljoin, urlparse
 from dataclasses import dataclass, field
 from typing import List, Optional
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import dedupe, docindex, dom, encoding, fetcher, triage
+from common.ancestry import Ancestry
+from common.concurrency import AIMDLimiter
+from common.engine import AsyncFetcher
+from common.rules import RuleSet
+
 URLS = [
     # Your Original List
     'https://mailchimp.com',
@@ -480,8 +488,21 @@ URLS = [
 ]
 
 HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+MAX_CONNECTIONS, MAX_PER_HOST = 16, 2
+CRAWL_DELAY = 2  # seconds between requests to the same domain
+STREAM_NAV = os.environ.get('NAV_STREAM') == '1'  # opt-in: stop downloading once the header/nav region has arrived
+SCRAPER = 'deep'  # name in the shared negative cache
 SKIP_TEXT = ['skip to', 'sr-only', 'visually-hidden']
+CTA_WORDS = ['sign up', 'get started', 'try free', 'start free', 'book demo', 'contact us']
+SKIP_RULES, CTA_RULES = RuleSet(SKIP_TEXT, literal=True), RuleSet(CTA_WORDS, literal=True)  # compiled once
+PANEL_RULES = Counter()  # which rule matched each trigger to its panel
 ICON_CHARS = re.compile(r'[▾▸►▼▲◄◀→←↑↓✓✕✗×›‹]')
+# Ancestor flags, computed once per document (see common.ancestry)
+USER_MENU_PATTERNS = re.compile(r'\b(?:user|account|profile|login)-?(?:menu|nav|dropdown)\b')
+ANCESTRY = Ancestry(footer=lambda e, cls_id: e.name == 'footer' or re.search(r'\bfooter\b', cls_id),
+                    footer_tag=lambda e, cls_id: e.name == 'footer',
+                    hidden=lambda e, cls_id: is_style_hidden(e),
+                    user_menu=lambda e, cls_id: USER_MENU_PATTERNS.search(cls_id))
 
 @dataclass
 class NavNode:
@@ -502,22 +523,32 @@ class NavNode:
 
 def fetch(url):
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=15)
+        resp = fetcher.get(url, headers=HEADERS, timeout=15, stream=STREAM_NAV)
         resp.raise_for_status()
-        return resp.text
+        return encoding.decode(resp)
     except Exception as e:
         print(f"   Fetch error: {str(e)[:80]}")
         return None
 
+LIMITER = AIMDLimiter(maximum=MAX_CONNECTIONS)
+ENGINE = AsyncFetcher(fetch, MAX_CONNECTIONS, MAX_PER_HOST, limiter=LIMITER, pace=fetcher.pace)
+
+async def fetch_page(url):
+    """Download url through ENGINE, returning (url, html)"""
+    return url, await ENGINE.fetch(url)
+
 def clean_text(text):
     if not text: return ""
     text = ICON_CHARS.sub('', text)
     text = re.sub(r'\s+', ' ', text).strip()
     return re.sub(r'^[^\w]+|[^\w]+$', '', text)
 
-def is_hidden(elem):
+def is_style_hidden(elem):
     style = elem.get('style', '').lower().replace(' ', '')
-    if 'display:none' in style or 'visibility:hidden' in style: return True
+    return 'display:none' in style or 'visibility:hidden' in style
+
+def is_hidden(elem):
+    if is_style_hidden(elem): return True
     cls = ' '.join(elem.get('class', [])).lower()
     return bool(re.search(r'\bsr-only\b|\bvisually-hidden\b|\bhidden\b|\bd-none\b', cls))
 
@@ -525,26 +556,29 @@ def should_skip(text, elem):
     if not text or len(text) < 1: return True
     if is_hidden(elem): return True
     text_lower = text.lower()
-    return any(skip in text_lower for skip in SKIP_TEXT)
+    return SKIP_RULES.search(text_lower)
 
 def is_footer(elem):
-    parents_list = list(elem.parents)
-    for i, p in enumerate(parents_list):
-        if i >= 12: break
-        if p.name == 'footer': return True
-        cls_id = ' '.join(p.get('class', [])).lower() + ' ' + p.get('id', '').lower()
-        if re.search(r'\bfooter\b', cls_id): return True
-    return False
+    return ANCESTRY.within(elem, 'footer', 12)
+
+def in_hidden(elem):
+    """Inside an element hidden by an inline display:none / visibility:hidden style"""
+    return ANCESTRY.within(elem, 'hidden')
+
+def in_user_menu(elem, cls_id):
+    """elem is, or sits inside, a user/account menu"""
+    return bool(USER_MENU_PATTERNS.search(cls_id)) or ANCESTRY.within(elem, 'user_menu')
 
 def find_primary_nav(soup):
     candidates = []
     for elem in soup.find_all(['nav', 'header', 'div'], limit=100):
         if is_hidden(elem): continue
         cls_id = ' '.join(elem.get('class', [])).lower() + ' ' + elem.get('id', '').lower()
-        if re.search(r'\bfooter\b|\bsidebar\b|\bmobile-menu\b|\boff-canvas\b', cls_id) or elem.find_parent('footer'): 
+        if re.search(r'\bfooter\b|\bsidebar\b|\bmobile-menu\b|\boff-canvas\b', cls_id) or ANCESTRY.within(elem, 'footer_tag') or \
+           in_hidden(elem) or in_user_menu(elem, cls_id): 
             continue
         
-        link_count = len(elem.find_all(['a', 'button']))
+        link_count = docindex.count(elem, 'a', 'button')
         if not (3 <= link_count <= 100): continue
         
         score = 100
@@ -553,10 +587,9 @@ def find_primary_nav(soup):
         if re.search(r'\bnav\b|\bmenu\b|\bheader\b', cls_id): score += 80
         if re.search(r'\bmain\b|\bprimary\b|\btop\b|\bglobal\b', cls_id): score += 120
         
-        parents_list = list(elem.parents)
-        depth = next((i for i, p in enumerate(parents_list) if p.name == 'body'), 0)
+        depth = docindex.depth(elem)
         score += 100 if depth <= 3 else (50 if depth <= 5 else -(depth-5)*20)
-        if elem.find('ul'): score += 40
+        if docindex.count(elem, 'ul'): score += 40
         
         candidates.append((score, elem, link_count))
     
@@ -566,7 +599,7 @@ def find_primary_nav(soup):
     return best[1]
 
 def extract_description(link):
-    for desc in link.find_all(['p', 'span', 'div'], class_=re.compile(r'\bdesc\b|\bsubtitle\b|\bcaption\b', re.I), limit=2):
+    for desc in docindex.find_all(link, r'\bdesc\b|\bsubtitle\b|\bcaption\b', ['p', 'span', 'div'], 2):
         desc_text = clean_text(desc.get_text(strip=True))
         if desc_text and 5 < len(desc_text) < 300:
             return desc_text
@@ -579,68 +612,96 @@ def extract_description(link):
 
 def is_cta_link(link):
     cls = ' '.join(link.get('class', [])).lower()
-    text = clean_text(link.get_text(strip=True)).lower()
+    text = clean_text(docindex.text(link)).lower()
     if re.search(r'\bbtn\b|\bbutton\b|\bcta\b|\bprimary\b', cls): return True
-    cta_words = ['sign up', 'get started', 'try free', 'start free', 'book demo', 'contact us']
-    return any(cta in text for cta in cta_words)
+    return CTA_RULES.search(text)
 
-def find_controlled_panel(trigger, soup):
+def find_controlled_panel(trigger, soup, li_panels=None):
+    """(panel, rule that found it) or (None, None); li_panels caches the li-parent lookup, which doesn't depend on the trigger"""
     if panel_id := trigger.get('aria-controls'):
-        if panel := soup.find(id=panel_id):
-            return panel
+        if panel := dom.by_id(soup, panel_id):
+            return panel, 'aria-controls'
     for attr in ['data-target', 'data-bs-target', 'data-dropdown']:
         if target := trigger.get(attr):
-            if panel := soup.find(id=target.lstrip('#')):
-                return panel
+            if panel := dom.by_id(soup, target.lstrip('#')):
+                return panel, attr
     if parent_li := trigger.find_parent('li'):
-        for child in parent_li.find_all(['ul', 'div', 'section'], recursive=False):
-            if child.find(['a', 'button']): return child
-        if panel := parent_li.find(['ul', 'div'], class_=re.compile(r'dropdown|submenu|mega|panel', re.I)):
-            return panel
+        if (li_panels := {} if li_panels is None else li_panels).get(id(parent_li)) is None:
+            li_panels[id(parent_li)] = \
+                next(((child, 'li-child') for child in parent_li.find_all(['ul', 'div', 'section'], recursive=False) if docindex.count(child, 'a', 'button')), None) or \
+                ((panel, 'li-class') if (panel := docindex.find(parent_li, r'dropdown|submenu|mega|panel', ['ul', 'div'])) else (None, None))
+        if li_panels[id(parent_li)][0]:
+            return li_panels[id(parent_li)]
     if next_sib := trigger.find_next_sibling(['div', 'ul', 'section']):
         if re.search(r'dropdown|menu|panel|mega', ' '.join(next_sib.get('class', [])).lower()):
-            return next_sib
-    return None
+            return next_sib, 'sibling'
+    return None, None
+
+def resolve_panels(nav, soup):
+    """One walk over nav: [(title, trigger, panel, rule)] for the first 200 <li> submenus, then 200 button/a/div toggles"""
+    lis, toggles = [], []
+    for elem in nav.find_all(['li', 'button', 'a', 'div']):
+        if len(group := lis if elem.name == 'li' else toggles) < 200:
+            group.append(elem)
+        elif len(lis) >= 200 and len(toggles) >= 200:
+            break
+    dropdowns, li_panels = [], {}
+    
+    for li in lis:
+        trigger = next((c for c in li.find_all(['a', 'button'], recursive=False, limit=1)), None)
+        if not trigger or is_hidden(trigger): continue
+        
+        title = clean_text(docindex.text(trigger))
+        if not title or should_skip(title, trigger): continue
+        
+        submenu = li.find(['ul', 'div', 'section'], recursive=False) or \
+                  docindex.find(li, r'dropdown|submenu|mega|panel', ['ul', 'div'])
+        
+        if submenu and docindex.count(submenu, 'a', 'button') >= 1:
+            dropdowns.append((title, trigger, submenu, 'li-submenu'))
+    
+    for elem in toggles:
+        if is_hidden(elem): continue
+        if not (elem.get('aria-expanded') or elem.get('aria-haspopup') or elem.get('data-toggle')): continue
+        
+        title = clean_text(docindex.text(elem))
+        if not title or should_skip(title, elem): continue
+        
+        panel, rule = find_controlled_panel(elem, soup, li_panels)
+        if panel and docindex.count(panel, 'a', 'button') >= 1:
+            dropdowns.append((title, elem, panel, rule))
+    
+    PANEL_RULES.update(rule for *_, rule in dropdowns)
+    return dropdowns
 
 def detect_columns(container):
     for pattern in [r'\bcol-|\bcolumn-|\bgrid', r'\bcol\b', r'\bmega-col\b']:
-        cols = container.find_all(['div', 'section', 'li'], class_=re.compile(pattern, re.I), limit=50)
+        cols = docindex.find_all(container, pattern, ['div', 'section', 'li'], 50)
         if len(cols) >= 2: return cols
     return []
 
 def detect_sections_by_headings(container):
+    """Links from each heading up to the next one, or 500 elements on; one sweep over the container's links"""
     sections = []
     headings = [h for h in container.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']) if not h.find('a')]
+    if not headings: return sections
+    elements, (start, end) = docindex.index(container).elements, docindex.span(container)
+    links = [i for i in range(start + 1, end + 1) if elements[i].name in ['a', 'button'] and elements[i].get('href')]
     for i, h in enumerate(headings):
         title = clean_text(h.get_text(strip=True))
         if not title or should_skip(title, h): continue
         
         next_h = headings[i+1] if i+1 < len(headings) else None
-        links = []
-        curr = h.find_next()
-        iterations = 0
-        
-        while curr and iterations < 500:
-            iterations += 1
-            if not curr: break
-            if next_h:
-                parents_list = list(curr.parents) if hasattr(curr, 'parents') else []
-                if curr == next_h or next_h in parents_list:
-                    break
-            
-            parents_list = list(curr.parents) if hasattr(curr, 'parents') else []
-            if container not in parents_list:
-                break
-                
-            if hasattr(curr, 'name') and curr.name in ['a', 'button'] and curr.get('href'):
-                links.append(curr)
-            try: 
-                curr = curr.find_next()
-            except: 
-                break
+        first = docindex.span(h)[0]
+        # bs4 == is structural: a copy of next_h enclosing the first step (duplicate headings) ended the walk at once
+        if next_h and any(x.name == next_h.name and docindex.span(x)[1] > first and x == next_h
+                          for x in [h, *takewhile(lambda p: p is not container, h.parents)]):
+            continue
+        stop = min(first + 500, docindex.span(next_h)[0] - 1 if next_h else end)
+        section = [elements[p] for p in links[bisect_right(links, first):bisect_right(links, stop)]]
         
-        if links:
-            sections.append((title, links))
+        if section:
+            sections.append((title, section))
     return sections
 
 def build_tree_from_container(container, base_url, seen_urls, depth=0, max_depth=4):
@@ -727,7 +788,7 @@ def create_link_node(link, base_url, seen_urls):
     href = link.get('href', '').strip()
     if not href or href.startswith('javascript:') or href == '#': return None
     
-    title = clean_text(link.get_text(strip=True))
+    title = clean_text(docindex.text(link))
     if not title or should_skip(title, link): return None
     if is_footer(link): return None
     
@@ -743,6 +804,11 @@ def create_link_node(link, base_url, seen_urls):
         is_cta=is_cta_link(link)
     )
 
+def adds_nothing(links, base_url, seen_urls):
+    """True if none of links can become a new link node (create_link_node needs a real href not yet seen)"""
+    return all(not (href := l.get('href', '').strip()) or href.startswith('javascript:') or href == '#' or
+               urljoin(base_url, href) in seen_urls for l in links)
+
 def extract_navigation_tree(nav, soup, base_url):
     tree = []
     seen_urls = set()
@@ -750,39 +816,20 @@ def extract_navigation_tree(nav, soup, base_url):
     dd_links = set()
     
     print("   Phase 1: Detecting dropdowns...")
-    dropdowns = []
-    
-    for li in nav.find_all('li', limit=200):
-        trigger = next((c for c in li.find_all(['a', 'button'], recursive=False, limit=1)), None)
-        if not trigger or is_hidden(trigger): continue
-        
-        title = clean_text(trigger.get_text(strip=True))
-        if not title or should_skip(title, trigger): continue
-        
-        submenu = li.find(['ul', 'div', 'section'], recursive=False) or \
-                  li.find(['ul', 'div'], class_=re.compile(r'dropdown|submenu|mega|panel', re.I))
-        
-        if submenu and len(submenu.find_all(['a', 'button'])) >= 1:
-            dropdowns.append((title, trigger, submenu))
-            dd_triggers.add(id(trigger))
+    dropdowns = resolve_panels(nav, soup)
+    dd_triggers.update(id(trigger) for _, trigger, _, _ in dropdowns)
     
-    for elem in nav.find_all(['button', 'a', 'div'], limit=200):
-        if is_hidden(elem): continue
-        if not (elem.get('aria-expanded') or elem.get('aria-haspopup') or elem.get('data-toggle')): continue
-        
-        title = clean_text(elem.get_text(strip=True))
-        if not title or should_skip(title, elem): continue
-        
-        if panel := find_controlled_panel(elem, soup):
-            if len(panel.find_all(['a', 'button'])) >= 1:
-                dropdowns.append((title, elem, panel))
-                dd_triggers.add(id(elem))
-    
-    print(f"   Found {len(dropdowns)} dropdowns")
+    print(f"   Found {len(dropdowns)} dropdowns ({', '.join(sorted({rule for *_, rule in dropdowns})) or 'none'})")
     print("   Phase 2: Building hierarchy...")
     
-    for title, trigger, panel in dropdowns:
-        for link in panel.find_all(['a', 'button']): dd_links.add(id(link))
+    copies = set()
+    for title, trigger, panel, _ in dropdowns:
+        links = panel.find_all(['a', 'button'])
+        for link in links: dd_links.add(id(link))
+        # A copy of a panel already built (same panel, or a desktop/mobile duplicate) is skipped once it can add nothing
+        if dedupe.is_copy(panel, copies) and adds_nothing(links, base_url, seen_urls):
+            dedupe.skipped(len(links))
+            continue
         
         children = build_tree_from_container(panel, base_url, seen_urls)
         if children:
@@ -800,7 +847,7 @@ def extract_navigation_tree(nav, soup, base_url):
         if id(link) in dd_triggers or id(link) in dd_links: continue
         
         if parent_li := link.find_parent('li'):
-            if parent_li.find(['ul', 'div'], class_=re.compile(r'dropdown|submenu', re.I)):
+            if docindex.find(parent_li, r'dropdown|submenu', ['ul', 'div']):
                 continue
         
         if node := create_link_node(link, base_url, seen_urls):
@@ -843,11 +890,16 @@ def validate_tree(tree, base_url):
     
     return True, f"{total} links, {ratio*100:.0f}% internal, {len(tree)} top items"
 
-def scrape(url):
+def scrape(url, html=None):
     print(f"\n{'='*70}\n{url}\n{'='*70}")
-    if not (html := fetch(url)): return None
+    if not (html := html or fetch(url)): return None
     
-    soup = BeautifulSoup(html, 'html.parser')
+    # Triage the raw page: JS-only shells are rejected unparsed
+    if (verdict := triage.triage(html))['strategy'] == 'shell':
+        print(f"   Skipped: JS-only shell ({verdict['reason']})")
+        return None
+    # Primary-nav selection compares candidates across the whole document, so the full page is parsed
+    soup = dom.parse(html, regions=False)
     if not (nav := find_primary_nav(soup)):
         print("   No primary nav found")
         return None
@@ -876,25 +928,50 @@ def scrape(url):
 def main():
     print(f"\n{'#'*70}\n# UNIVERSAL NAVIGATION SCRAPER v3.0 FIXED\n# Processing {len(URLS)} websites\n{'#'*70}")
     
+    fetcher.shared_fetcher().scheduler.delay = CRAWL_DELAY
+    fetcher.observe(LIMITER.record)
     success, results = 0, []
-    for i, url in enumerate(URLS, 1):
-        print(f"\n{'#'*70}\n# [{i}/{len(URLS)}]\n{'#'*70}")
-        try:
-            if data := scrape(url):
-                filename = f"{urlparse(url).netloc.replace('www.', '')}.json"
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                print(f"   Saved: {filename}")
-                success += 1
-                results.append((url, 'SUCCESS', filename))
+    
+    async def crawl():
+        # Sites download in parallel (paced per domain by the fetcher); each is extracted as soon as it arrives
+        nonlocal success
+        # Inputs that are the same site (www./non-www., known redirects) are scraped once
+        jobs = fetcher.jobs(URLS)
+
+        def record(url, status, detail):
+            """Add a result row for url and one for each input merged into it"""
+            results.append((url, status, detail))
+            results.extend((alias, status, f"{detail} (same site as {url})") for alias in jobs[url][1:])
+
+        urls = []
+        for url in jobs:
+            if fetcher.is_known_bad(url, SCRAPER):
+                record(url, 'SKIPPED', 'Known dead or unparseable')
             else:
-                results.append((url, 'FAILED', 'Validation failed'))
-        except Exception as e:
-            print(f"   Exception: {str(e)[:150]}")
-            import traceback
-            traceback.print_exc()
-            results.append((url, 'ERROR', str(e)[:80]))
-        time.sleep(2)
+                urls.append(url)
+        for i, done in enumerate(asyncio.as_completed([fetch_page(url) for url in urls]), 1):
+            url, html = await done
+            print(f"\n{'#'*70}\n# [{i}/{len(urls)}]\n{'#'*70}")
+            try:
+                if not html:
+                    record(url, 'FAILED', 'Fetch failed')
+                elif data := scrape(url, html):
+                    filename = f"{urlparse(url).netloc.replace('www.', '')}.json"
+                    with open(filename, 'w', encoding='utf-8') as f:
+                        json.dump(data, f, indent=2, ensure_ascii=False)
+                    print(f"   Saved: {filename}")
+                    success += len(jobs[url])
+                    record(url, 'SUCCESS', filename)
+                else:
+                    fetcher.mark_unparseable(url, SCRAPER)
+                    record(url, 'FAILED', 'Validation failed')
+            except Exception as e:
+                print(f"   Exception: {str(e)[:150]}")
+                import traceback
+                traceback.print_exc()
+                record(url, 'ERROR', str(e)[:80])
+    
+    asyncio.run(crawl())
     
     print(f"\n\n{'='*70}\n   FINAL: {success}/{len(URLS)} ({success/len(URLS)*100:.1f}%)\n{'='*70}\n")
     
@@ -902,7 +979,8 @@ def main():
         symbol = "PASS" if status == "SUCCESS" else "FAIL"
         print(f"[{symbol}] {urlparse(url).netloc.replace('www.', ''):25s} {detail}")
     
-    print(f"\n{'='*70}\nSuccess: {success} | Failed: {len(URLS)-success}\n{'='*70}\n")
+    print(f"\n{'='*70}\nSuccess: {success} | Failed: {len(URLS)-success}")
+    print(f"{fetcher.report()}\nTriage: {triage.report()}\nParsing: {dom.report()}\nPanels: {', '.join(f'{n} {rule}' for rule, n in PANEL_RULES.most_common()) or 'none'}\nDuplicates: {dedupe.report()}\nConcurrency: {LIMITER.report()}\n{'='*70}\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,31 @@
+from math import inf
+
+from bs4 import BeautifulSoup
+
+from common.ancestry import Ancestry
+
+HTML = ('<body><div style="display: none"><nav id="copy"><a href="/a">A</a></nav></div>'
+        '<div class="user-menu"><ul><li><a id="me" href="/me">Me</a></li></ul></div>'
+        '<footer><div><p><a id="legal" href="/legal">Legal</a></p></div></footer></body>')
+
+
+def ancestry():
+    return Ancestry(footer=lambda e, cls_id: e.name == 'footer',
+                    hidden=lambda e, cls_id: 'display:none' in e.get('style', '').replace(' ', ''),
+                    user_menu=lambda e, cls_id: 'user-menu' in cls_id)
+
+
+def test_flags_are_inherited_with_distances():
+    soup, flags = BeautifulSoup(HTML, 'html.parser'), ancestry()
+    legal, me, copy = soup.find(id='legal'), soup.find(id='me'), soup.find(id='copy')
+    assert flags.distance(legal, 'footer') == 3
+    assert flags.within(legal, 'footer') and flags.within(legal, 'footer', 3) and not flags.within(legal, 'footer', 2)
+    assert flags.within(me, 'user_menu') and not flags.within(me, 'hidden')
+    assert flags.within(copy, 'hidden') and flags.within(copy.a, 'hidden')
+    assert flags.distance(soup.body, 'footer') == inf
+
+
+def test_an_element_is_not_its_own_ancestor():
+    soup, flags = BeautifulSoup(HTML, 'html.parser'), ancestry()
+    assert not flags.within(soup.footer, 'footer')
+    assert not flags.within(soup.find(class_='user-menu'), 'user_menu')
@@ -0,0 +1,37 @@
+from common.navstream import NavRegionWatcher
+from common.transport import CHUNK_SIZE
+
+
+def stream(html, watcher=None):
+    """Bytes a streamed download of html would keep before the watcher stops it"""
+    body, watcher = html.encode(), watcher or NavRegionWatcher()
+    for start in range(0, len(body), CHUNK_SIZE):
+        if watcher.feed_bytes(body[start:start + CHUNK_SIZE]):
+            return body[:start + CHUNK_SIZE]
+    return body
+
+
+def mega_menu(n):
+    items = ''.join(f'<li><a href="/product/{i}">Product {i}</a></li>' for i in range(8))
+    return ''.join(f'<li><button aria-expanded="false" aria-controls="panel{m}">Menu {m}</button>'
+                   f'<div id="panel{m}"><ul>{items}</ul></div></li>' for m in range(n))
+
+
+def test_skip_links_and_svg_sprite_do_not_stop_before_the_header():
+    sprite = '<svg style="display:none">' + ''.join(
+        f'<symbol id="i{i}"><path d="{"M0 0L1 1 " * 40}"/></symbol>' for i in range(150)) + '</svg>'
+    html = ('<html><body><nav class="skip-links"><a href="#main">Skip to content</a></nav>' + sprite +
+            f'<header><nav class="main"><ul>{mega_menu(4)}</ul></nav></header>'
+            '<main id="main">' + '<p>Body text.</p>' * 5000 + '</main></body></html>')
+    assert len(sprite) > 50_000
+    kept = stream(html).decode()
+    assert '</header>' in kept
+    assert len(kept) < len(html)
+
+
+def test_stops_after_the_menu_region_and_tail():
+    html = (f'<html><body><header><nav><ul>{mega_menu(3)}</ul></nav></header>'
+            '<main>' + '<p>Body text.</p>' * 10000 + '</main></body></html>')
+    kept = stream(html).decode()
+    assert '</header>' in kept
+    assert len(kept) < len(html) // 2
@@ -0,0 +1,23 @@
+from common import prune
+
+
+def test_custom_elements_named_like_pruned_tags_are_kept():
+    html = ('<nav><svg-icon name="menu"></svg-icon><a href="/pricing">Pricing</a>'
+            '<style-guide><a href="/docs">Docs</a></style-guide><script-loader></script-loader>'
+            '<a href="/blog">Blog</a></nav><style>nav { color: red }</style>')
+    out = prune.prune(html)
+    for link in ('href="/pricing"', 'href="/docs"', 'href="/blog"', '<svg-icon name="menu">', '<style-guide>'):
+        assert link in out
+    assert out.endswith('<style></style>')
+
+
+def test_nested_svg_is_removed_whole():
+    html = ('<a href="/a" aria-label="Home"><svg class="icon"><title>Home</title><svg x="1"><path d="M0"/></svg>'
+            '<path d="M1"/></svg></a><a href="/b">B</a>')
+    out = prune.prune(html)
+    assert out == '<a href="/a" aria-label="Home"><svg class="icon"><title>Home</title></svg></a><a href="/b">B</a>'
+
+
+def test_self_closing_and_unclosed_svg_are_left_alone():
+    html = '<a href="/a"><svg class="x"/>A</a><svg><path d="M0"/>'
+    assert prune.prune(html) == html
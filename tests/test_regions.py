@@ -0,0 +1,46 @@
+import contextlib
+import importlib.util
+import io
+import os
+
+import pytest
+
+pytest.importorskip('selectolax')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load(name, path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def page():
+    """Buffer's features mega menu (app/panel.html) rendered outside the header, as a portal, behind a
+    header nav trigger, with a main/top menu before the header and body and footer links around it"""
+    with open(os.path.join(ROOT, 'app', 'panel.html'), encoding='utf-8') as f:
+        panel = f.read()
+    top = ''.join(f'<li><a href="/top/{i}">Top {i}</a></li>' for i in range(5))
+    posts = ''.join(f'<p><a href="/post/{i}">Post {i}</a></p>' for i in range(20))
+    return (f'<html><body><div class="main-menu"><ul>{top}</ul></div>'
+            '<header class="site-header"><nav aria-label="Main"><ul>'
+            '<li><button aria-expanded="false" aria-controls="navigation-menu">Features</button></li>'
+            '<li><a href="/pricing">Pricing</a></li><li><a href="/blog">Blog</a></li><li><a href="/about">About</a></li>'
+            f'</ul></nav></header>{panel}<main><h1>Title</h1>{posts}</main>'
+            '<footer><nav><a href="/terms">Terms</a><a href="/privacy">Privacy</a></nav></footer></body></html>')
+
+
+@pytest.mark.parametrize('name, path', [('app_app', 'app/app.py'), ('deep_app', 'deep/app.py'), ('try_try', 'try/try.py')])
+def test_region_parsing_does_not_change_scraper_output(monkeypatch, name, path):
+    scraper, html, results = load(name, path), page(), []
+    monkeypatch.setenv('NAV_DOM', 'lexbor')
+    for regions in ('0', '1'):
+        monkeypatch.setenv('NAV_REGIONS', regions)
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = scraper.extract_menus(html, 'https://buffer.com') if name == 'app_app' else scraper.scrape('https://buffer.com', html)
+        assert data
+        data.pop('scraped_at')
+        results.append(data)
+    assert results[0] == results[1]
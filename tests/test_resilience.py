@@ -0,0 +1,48 @@
+import socket
+import ssl
+
+import requests
+
+from common.resilience import NegativeCache, classify_error
+
+
+def raised(exc, cause=None):
+    """exc as raised while handling cause"""
+    try:
+        try:
+            raise cause or exc
+        except Exception:
+            if cause is None:
+                raise
+            raise exc
+    except Exception as e:
+        return e
+
+
+def test_errors_are_classified_by_type_not_by_the_host_in_the_message():
+    url = 'https://ssl-certificate-shop.example.com/'
+    assert classify_error(raised(requests.exceptions.ReadTimeout(f"Read timed out: {url}"))) == 'retry'
+    assert classify_error(raised(requests.exceptions.ConnectionError(f"reset: {url}"), ConnectionResetError())) == 'retry'
+    assert classify_error(raised(ValueError(f"bad chunk from {url}"))) == 'fail'
+
+
+def test_dns_tls_and_redirect_loops_are_dead():
+    dns = raised(requests.exceptions.ConnectionError('Max retries exceeded'), socket.gaierror(-2, 'Name or service not known'))
+    assert classify_error(dns) == 'dead'
+    assert classify_error(raised(ssl.SSLCertVerificationError('certificate verify failed'))) == 'dead'
+    assert classify_error(raised(requests.exceptions.SSLError('handshake failed'))) == 'dead'
+    assert classify_error(raised(requests.exceptions.TooManyRedirects('Exceeded 30 redirects.'))) == 'dead'
+
+
+def test_tls_handshake_timeout_is_retried():
+    assert classify_error(raised(requests.exceptions.SSLError('handshake'), TimeoutError('timed out'))) == 'retry'
+
+
+def test_lookups_do_not_count_skips(tmp_path):
+    cache = NegativeCache(str(tmp_path / 'negative.sqlite'))
+    cache.mark('https://dead.example/', 'HTTP 404')
+    assert cache.reason('https://dead.example/') == cache.reason('https://dead.example/') == 'HTTP 404'
+    assert cache.stats['skipped'] == 0
+    assert cache.skip('https://dead.example/') == 'HTTP 404'
+    assert cache.skip('https://alive.example/') is None
+    assert cache.stats['skipped'] == 1
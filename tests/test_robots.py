@@ -0,0 +1,34 @@
+from common.robots import RobotsRules, parse
+
+BROWSER = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+
+def test_group_is_chosen_by_product_token_not_substring():
+    for token in ('a', 'x', 'safari', 'windows', 'chrome'):
+        assert parse(f"User-agent: {token}\nDisallow: /x\n", BROWSER) == ([], None)
+    text = "User-agent: *\nDisallow: /all\n\nUser-agent: a\nDisallow: /x\n"
+    assert parse(text, BROWSER) == ([(False, '/all')], None)
+
+
+def test_group_matching_is_case_insensitive_with_star_fallback():
+    text = "User-agent: *\nDisallow: /all\n\nUser-agent: NavBot\nUser-agent: other\nDisallow: /nav\nCrawl-delay: 5\n"
+    assert parse(text, 'navbot/1.0 (+https://example.com)') == ([(False, '/nav')], 5.0)
+    assert parse(text, 'NAVBOT') == ([(False, '/nav')], 5.0)
+    assert parse(text, 'navbotx/1.0') == ([(False, '/all')], None)
+    assert parse(text, '*') == ([(False, '/all')], None)
+
+
+def test_longest_match_wins_and_allow_wins_ties():
+    rules = RobotsRules([(False, '/shop'), (True, '/shop/public'), (False, '/docs'), (True, '/docs')])
+    assert not rules.allowed('/shop/cart')
+    assert rules.allowed('/shop/public/item')
+    assert rules.allowed('/docs/intro')
+    assert rules.allowed('/blog')
+
+
+def test_wildcards_and_end_anchor():
+    rules = RobotsRules([(False, '/*.pdf$'), (True, '/'), (False, '/private*/data')])
+    assert not rules.allowed('/files/report.pdf')
+    assert rules.allowed('/files/report.pdf?download=1')
+    assert not rules.allowed('/private-area/data/1')
+    assert RobotsRules(disallow_all=True).allowed('/') is False
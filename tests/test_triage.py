@@ -0,0 +1,22 @@
+from bs4 import BeautifulSoup
+
+from common import triage
+
+
+def test_markers_come_from_nav_region_classes_only():
+    html = ('<html><head><style>.global-nav-tab { color: red }</style></head><body>'
+            '<script>window.cls = "NavigationMenu_trigger";</script>'
+            '<main><div class="global-nav-tab">not a nav</div></main>'
+            '<header><nav><button class="NavigationMenu_trigger__x">Product</button></nav></header></body></html>')
+    assert triage.markers(BeautifulSoup(html, 'html.parser')) == ['asana.com']
+
+
+def test_raw_text_markers_do_not_switch_profiles():
+    html = '<body><script>const tab = "global-nav-tab";</script><nav><a href="/a">A</a></nav></body>'
+    assert triage.markers(BeautifulSoup(html, 'html.parser')) == []
+    assert 'markers' not in triage.triage(html)
+
+
+def test_shell_pages_are_rejected_unparsed():
+    assert triage.triage('<body><div id="root"></div></body>')['strategy'] == 'shell'
+    assert triage.triage('<body><header><a href="/">Home</a></header></body>')['strategy'] == 'landmarks'